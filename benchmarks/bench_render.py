@@ -0,0 +1,85 @@
+# Cost per action, in the engine and in the repaint, as the quest list grows.
+# Needs a display; on a headless box run it under Xvfb:  xvfb-run python benchmarks/bench_render.py
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rpg_catalog import Catalog, read_content
+from rpg_gui import AnimatedRPG
+
+# Quests that keep advancing however many there are
+LIVE_QUESTS = 5
+
+
+def padded_catalog(n_items=0):
+    # Stock content with items up to n_items, then one more enemy and item
+    # that fill_quests keeps the dice from ever picking
+    content = read_content()
+    content["items"] += [{"name": f"relic{i}"} for i in range(len(content["items"]), n_items)]
+    content["enemies"].append({"name": "training dummy", "xp": 0, "gold": 0})
+    content["items"].append({"name": "lost relic"})
+    return Catalog(content)
+
+
+def fill_quests(game, n, live=LIVE_QUESTS):
+    # The game must use padded_catalog(). The first `live` quests are on
+    # targets that roll; the rest wait on the padded enemy and item, so an
+    # action changes the same few quests at any n.
+    engine = game.engine
+    idle = (len(engine.enemies) - 1, len(engine.items) - 1)
+    engine.set_content_size(*idle)
+    while len(engine.player.quests) < n:
+        quest = engine.make_quest(engine.player.level)
+        if len(engine.player.quests) >= live:
+            quest.target = idle[quest.kind]
+        # Never completes, so the panel keeps n rows for the whole run
+        quest.need = 10 ** 9
+        engine.available_quests[0] = quest
+        engine.accept_quest(quest)
+
+
+def forward_changes(game):
+    # Rendering only: pass panel changes on, skip the log and floating text
+    def on_event(event, *args):
+        if event == "changed":
+            game.on_engine_event(event, *args)
+    return on_event
+
+
+def bench_action(game, n_quests, actions=200):
+    # Returns seconds per action in the engine and in the idle repaint
+    fill_quests(game, n_quests)
+    game.update_display()
+    game.root.update()
+
+    engine = game.engine
+    stepping = rendering = 0.0
+    for i in range(actions):
+        start = time.perf_counter()
+        engine.step("fight" if i % 2 else "explore")
+        stepped = time.perf_counter()
+        game.root.update_idletasks()
+        stepping += stepped - start
+        rendering += time.perf_counter() - stepped
+    return stepping / actions, rendering / actions
+
+
+def main():
+    with tempfile.TemporaryDirectory(prefix="bench-log-") as log_dir:
+        game = AnimatedRPG(player_name="Benchmark Hero", log_dir=log_dir, save_dir=None,
+                           catalog=padded_catalog())
+        game.engine.listeners[:] = [forward_changes(game)]
+
+        print(f"{'quests':>8} {'engine ms':>10} {'render ms':>10}")
+        for n in (5, 50, 500):
+            stepping, rendering = bench_action(game, n)
+            print(f"{n:>8} {stepping * 1000:>10.3f} {rendering * 1000:>10.3f}")
+
+        game.on_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# Repeatable benchmarks for the AnimatedRPG hot paths. Without a $DISPLAY
+# the suite starts its own Xvfb server (or run it under xvfb-run).
+#
+#   python benchmarks/gui_suite.py                      run and compare with baseline.json
+#   python benchmarks/gui_suite.py --save-baseline      record a new baseline
+#   python benchmarks/gui_suite.py --output run.json    also keep this run's results
+import json
+import os
+import platform
+import select
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_render import fill_quests, padded_catalog
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+def ensure_display():
+    # Returns the Xvfb process we started, if any
+    if os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if xvfb is None:
+        sys.exit("No $DISPLAY and Xvfb is not installed; run under xvfb-run or install Xvfb")
+    # With -displayfd Xvfb picks a free display number and writes it to the
+    # pipe once it accepts connections
+    read_fd, write_fd = os.pipe()
+    proc = subprocess.Popen([xvfb, "-displayfd", str(write_fd), "-screen", "0", "1280x800x24",
+                             "-nolisten", "tcp"], pass_fds=(write_fd,),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as ready:
+        number = ready.readline().strip() if select.select([ready], [], [], 10)[0] else ""
+    if not number:
+        proc.kill()
+        sys.exit("Xvfb did not start")
+    os.environ["DISPLAY"] = f":{number}"
+    return proc
+
+
+def new_game(catalog=None):
+    from rpg_clock import MANUAL
+    from rpg_gui import AnimatedRPG
+
+    # Manual clock: no background timers fire while a benchmark runs; the
+    # activity log goes to a scratch directory that close_game removes
+    game = AnimatedRPG(player_name="Benchmark Hero", log_dir=tempfile.mkdtemp(prefix="bench-log-"),
+                       save_dir=None, seed=1234, speed=MANUAL, catalog=catalog)
+    game.root.update()
+    return game
+
+
+def close_game(game):
+    game.on_close()
+    shutil.rmtree(game.activity_log.directory, ignore_errors=True)
+
+
+def median_time(func, repeat=5, number=1, setup=None):
+    # setup, if given, runs untimed before every call
+    times = []
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(number):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            func()
+            total += time.perf_counter() - start
+        times.append(total / number)
+    return statistics.median(times)
+
+
+def bench_update_display(n_quests, n_items):
+    # Pad the stock content with extra items for the bigger inventories
+    game = new_game(padded_catalog(n_items))
+    engine = game.engine
+    # Time the repaint alone: with no listeners an action only changes
+    # state, and sends nothing to the log, animations or idle repaints
+    engine.listeners.clear()
+    fill_quests(game, n_quests)
+    inventory = game.player.inventory
+    for item in range(n_items):
+        inventory[item] = 1
+    game.update_display()
+    game.root.update()
+
+    def action():
+        engine.step("fight")
+        for item in range(len(inventory)):
+            inventory[item] += 1
+
+    def repaint():
+        game.update_display()
+        game.root.update_idletasks()
+
+    try:
+        return median_time(repaint, number=20, setup=action)
+    finally:
+        close_game(game)
+
+
+def bench_log_message(log_lines, messages=1000):
+    game = new_game()
+    for i in range(log_lines):
+        game.log_view.append(f"history line {i}")
+    game.root.update()
+
+    def burst():
+        for i in range(messages):
+            game.log_message(f"⚔️ benchmark message {i}")
+        game.root.update_idletasks()
+
+    try:
+        return median_time(burst) / messages
+    finally:
+        close_game(game)
+
+
+def bench_floating_text_burst(size=200):
+    game = new_game()
+    animator = game.animator
+
+    def burst():
+        for i in range(size):
+            game.add_floating_text(f"+{i} XP")
+        game.root.update_idletasks()
+        # Run the burst to completion frame by frame
+        while animator.tweens:
+            animator.stop()
+            animator.tick()
+            game.root.update_idletasks()
+
+    try:
+        return median_time(burst)
+    finally:
+        close_game(game)
+
+
+def bench_level_up():
+    game = new_game()
+    animator = game.animator
+
+    def level_up():
+        game.show_level_up_animation()
+        game.root.update_idletasks()
+        while animator.tweens:
+            animator.stop()
+            animator.tick()
+            game.root.update_idletasks()
+
+    try:
+        return median_time(level_up)
+    finally:
+        close_game(game)
+
+
+def run_suite():
+    results = {}
+    for n_quests, n_items in ((5, 4), (50, 4), (500, 4), (50, 40)):
+        key = f"update_display[quests={n_quests},items={n_items}]"
+        results[key] = bench_update_display(n_quests, n_items) * 1000
+    for log_lines in (10000, 100000):
+        results[f"log_message[lines={log_lines}]"] = bench_log_message(log_lines) * 1000
+    results["floating_text_burst[200]"] = bench_floating_text_burst() * 1000
+    results["level_up_animation"] = bench_level_up() * 1000
+    return results
+
+
+def compare(results, baseline, threshold):
+    # Benchmarks slower than baseline by more than their threshold
+    regressions = []
+    thresholds = baseline.get("thresholds", {})
+    for name, value in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        limit = thresholds.get(name, threshold)
+        if value > base * (1 + limit):
+            regressions.append((name, base, value, limit))
+    return regressions
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="GUI hot path benchmarks")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", default=None, help="write this run's results to a JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction of the baseline")
+    args = parser.parse_args()
+
+    xvfb = ensure_display()
+    try:
+        results = run_suite()
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "unit": "ms",
+        },
+        "results": results,
+    }
+    for name, value in results.items():
+        print(f"{name:<45} {value:10.3f} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                report["thresholds"] = json.load(f).get("thresholds", {})
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; record one with --save-baseline")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for name, base, value, limit in regressions:
+        print(f"REGRESSION {name}: {base:.3f} -> {value:.3f} ms (allowed +{limit:.0%})")
+    if regressions:
+        sys.exit(1)
+    print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# Synthetic client swarm for rpg_server. Starts a GameServer in this process
+# (or targets --server HOST:PORT), connects every hero at once and has each
+# send random actions, then reports throughput and request latency.
+#
+#   python benchmarks/server_swarm.py --clients 2000 --actions 50
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rpg_catalog import load_catalog
+from rpg_client import parse_address
+from rpg_profiler import percentile
+from rpg_server import LINE_LIMIT, GameServer, SessionStore
+
+# (op, weight, extra arguments)
+MIX = (
+    ("fight", 40, lambda rng: {"count": rng.choice((1, 1, 1, 5, 25))}),
+    ("explore", 30, lambda rng: {"count": rng.choice((1, 1, 1, 5, 25))}),
+    ("accept_quest", 20, lambda rng: {"slot": rng.randrange(3)}),
+    ("collect_quests", 10, lambda rng: {}),
+)
+
+
+def raise_fd_limit():
+    # Every client holds a socket, and with an in-process server so does
+    # its other end
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def run_client(host, port, name, actions, seed, checksum, latencies):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+
+    async def call(msg):
+        writer.write(json.dumps(msg, separators=(",", ":")).encode() + b"\n")
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        if "error" in reply:
+            raise RuntimeError(f"{name}: {reply['error']}")
+        return reply
+
+    await call({"op": "hello", "name": name, "content": checksum})
+    ops = [op for op, _, _ in MIX]
+    weights = [w for _, w, _ in MIX]
+    extras = {op: extra for op, _, extra in MIX}
+    for _ in range(actions):
+        op = rng.choices(ops, weights)[0]
+        start = time.perf_counter()
+        await call({"op": op, **extras[op](rng)})
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+async def swarm(clients, actions, server_address=None, seed=0):
+    catalog = load_catalog()
+    server = store = None
+    if server_address is None:
+        store = SessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+        server = GameServer(store, catalog)
+        host, port = await server.start("127.0.0.1", 0)
+    else:
+        host, port = parse_address(server_address)
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, f"swarm-{seed}-{i}", actions, seed * 1_000_003 + i,
+                                      catalog.checksum, latencies)
+                           for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    result = {"clients": clients, "requests": len(latencies), "elapsed": elapsed,
+              "requests_per_sec": len(latencies) / elapsed}
+    ordered = sorted(latencies)
+    for p in (50, 95, 99):
+        result[f"p{p}_ms"] = percentile(ordered, p) * 1000
+    result["mean_ms"] = statistics.fmean(ordered) * 1000
+
+    if server is not None:
+        await server.stop()
+        store.close()
+        result["sessions"] = len(server.sessions)
+        result["flushes"] = server.flushes
+        result["rows_saved"] = server.saved
+    return result
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test rpg_server with synthetic clients")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--actions", type=int, default=50, help="requests per client")
+    parser.add_argument("--server", default=None, metavar="HOST:PORT",
+                        help="target a running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    result = asyncio.run(swarm(args.clients, args.actions, args.server, args.seed))
+    for key, value in result.items():
+        print(f"{key:<18} {value:,.3f}" if isinstance(value, float) else f"{key:<18} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+# Soak test: hours of simulated play, driven through the game's own button
+# handlers on a manual clock, sampling memory and Tk resources as it goes.
+# Fails (exit 1) if any of them keeps growing once the game has warmed up.
+# Without a $DISPLAY it starts Xvfb like gui_suite.py.
+#
+#   python benchmarks/soak.py --hours 8                 eight hours of play
+#   python benchmarks/soak.py --hours 2 --output soak.csv
+import csv
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui_suite import ensure_display
+
+# name, absolute slack, checked for growth
+METRICS = (
+    ("python_kb", 512, True),
+    ("widgets", 5, True),
+    ("quest_widgets", 30, True),
+    ("inventory_widgets", 5, True),
+    ("canvas_items", 20, True),
+    ("tk_after", 5, True),
+    ("clock_timers", 5, True),
+    ("log_lines", 10, True),
+    ("toplevels", 1, True),
+    ("quests", 0, False),
+    ("level", 0, False),
+)
+COLUMNS = ("virtual_s", "actions") + tuple(name for name, _, _ in METRICS)
+
+# Keep the bot's quest log short, like a player would
+MAX_ACTIVE_QUESTS = 5
+
+
+def new_game(seed, save_dir, log_dir, history_rows):
+    from rpg_clock import MANUAL
+    from rpg_gui import AnimatedRPG
+
+    # The analytics history is bounded on its own, but far above what a
+    # short soak reaches; cap it low so it plateaus within the run instead
+    # of reading as growth
+    game = AnimatedRPG(player_name="Soak Hero", log_dir=log_dir, save_dir=save_dir,
+                       seed=seed, speed=MANUAL, history_rows=history_rows)
+    game.root.update()
+    return game
+
+
+def toplevels(root):
+    return [w for w in root.winfo_children() if w.winfo_class() == "Toplevel"]
+
+
+def sample(game, actions):
+    from rpg_profiler import count_widgets
+
+    root = game.root
+    gc.collect()
+    return (
+        game.clock.now() / 1000,
+        actions,
+        tracemalloc.get_traced_memory()[0] // 1024,
+        count_widgets(root),
+        count_widgets(game.quest_frame),
+        count_widgets(game.inventory_frame),
+        len(game.animation_canvas.find_all()),
+        len(root.tk.splitlist(root.tk.call("after", "info"))),
+        game.clock.pending(),
+        int(game.log_text.index("end-1c").split(".")[0]) - 1,
+        len(toplevels(root)),
+        len(game.player.quests),
+        game.player.level,
+    )
+
+
+def run_until_idle(game, step_ms=100, limit_ms=60000):
+    # Advance game time until the action in flight has resolved
+    waited = 0
+    while game.pending_job is not None and waited < limit_ms:
+        game.clock.advance(step_ms)
+        game.root.update()
+        waited += step_ms
+
+
+def play(game, rng):
+    # One player action, picked the way a restless player clicks
+    roll = rng.random()
+    if roll < 0.35:
+        game.repeat_var.set(rng.choice((1, 1, 1, 1, 5, 25)))
+        game.fight_action()
+    elif roll < 0.65:
+        game.repeat_var.set(rng.choice((1, 1, 1, 1, 5, 25)))
+        game.explore_action()
+    elif roll < 0.8:
+        game.new_quest_action()
+        game.root.update()
+        window = toplevels(game.root)[-1]
+        if len(game.player.quests) < MAX_ACTIVE_QUESTS and game.available_quests:
+            game.accept_quest(rng.choice(game.available_quests), window)
+        else:
+            window.destroy()
+    elif roll < 0.9:
+        game.show_quests_action()
+    else:
+        game.show_inventory_action()
+    run_until_idle(game)
+    game.repeat_var.set(1)
+
+
+def soak(hours, seed=0, sample_s=60, think_ms=(200, 3000), history_rows=2000, progress=True):
+    rng = random.Random(seed)
+    save_dir = tempfile.mkdtemp(prefix="soak-save-")
+    log_dir = tempfile.mkdtemp(prefix="soak-log-")
+    tracemalloc.start()
+    game = new_game(seed, save_dir, log_dir, history_rows)
+    clock = game.clock
+
+    samples = [sample(game, 0)]
+    snapshots = []
+    end = hours * 3600 * 1000
+    next_sample = sample_s * 1000
+    actions = 0
+    started = time.perf_counter()
+    try:
+        while clock.now() < end:
+            play(game, rng)
+            actions += 1
+            # Idle between clicks; animations and sparkles keep running
+            clock.advance(rng.uniform(*think_ms))
+            game.root.update()
+
+            if clock.now() >= next_sample:
+                next_sample += sample_s * 1000
+                samples.append(sample(game, actions))
+                # Compare the heap after warm-up with the heap at the end
+                if len(snapshots) == 0 and clock.now() >= end * 0.25:
+                    snapshots.append(tracemalloc.take_snapshot())
+                if progress:
+                    print(f"\r{clock.now() / 3.6e6:5.2f}/{hours:g} h simulated, {actions} actions, "
+                          f"{time.perf_counter() - started:.0f}s", end="", file=sys.stderr)
+        snapshots.append(tracemalloc.take_snapshot())
+    finally:
+        if progress:
+            print(file=sys.stderr)
+        game.on_close()
+        tracemalloc.stop()
+        shutil.rmtree(save_dir, ignore_errors=True)
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    top = []
+    if len(snapshots) == 2:
+        top = snapshots[1].compare_to(snapshots[0], "lineno")[:10]
+    return samples, top, time.perf_counter() - started
+
+
+def check_growth(samples, warmup=0.25, tolerance=0.1):
+    # A bounded resource plateaus after warm-up, so its peak over the last
+    # quarter of the run stays within tolerance of its peak over the first
+    # quarter after warm-up. Returns {metric: (first, last, grew)}.
+    steady = samples[int(len(samples) * warmup):]
+    quarter = max(1, len(steady) // 4)
+    first, last = steady[:quarter], steady[-quarter:]
+    verdicts = {}
+    for i, (name, slack, checked) in enumerate(METRICS, start=2):
+        early = max(row[i] for row in first)
+        late = max(row[i] for row in last)
+        verdicts[name] = (early, late, checked and late > early * (1 + tolerance) + slack)
+    return verdicts
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Long-running leak and resource-growth check")
+    parser.add_argument("--hours", type=float, default=4, help="simulated hours of play")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sample", type=float, default=60, help="simulated seconds between samples")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="allowed relative growth of each metric after warm-up")
+    parser.add_argument("--history-rows", type=int, default=2000,
+                        help="analytics history cap during the run")
+    parser.add_argument("--output", default=None, help="write every sample to a CSV file")
+    args = parser.parse_args()
+
+    xvfb = ensure_display()
+    try:
+        samples, top, elapsed = soak(args.hours, args.seed, args.sample,
+                                     history_rows=args.history_rows)
+    finally:
+        if xvfb is not None:
+            xvfb.terminate()
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(samples)
+
+    print(f"{samples[-1][1]} actions over {args.hours:g} simulated hours "
+          f"in {elapsed:.0f}s, {len(samples)} samples")
+    if len(samples) < 8:
+        sys.exit("Too few samples to judge growth; run longer or sample more often")
+
+    verdicts = check_growth(samples, tolerance=args.tolerance)
+    print(f"{'metric':<20} {'after warm-up':>14} {'end':>10}")
+    for name, (early, late, grew) in verdicts.items():
+        print(f"{name:<20} {early:>14,} {late:>10,}   {'GROWING' if grew else 'ok'}")
+    if top:
+        print("\nLargest heap growth since warm-up:")
+        for stat in top:
+            print(f"  {stat.size_diff / 1024:+9.1f} KiB {stat.count_diff:+7} blocks  {stat.traceback}")
+
+    failed = [name for name, (_, _, grew) in verdicts.items() if grew]
+    if failed:
+        sys.exit(f"Unbounded growth in: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import os
+import time
+from collections import deque
+
+ANALYTICS_DIR = os.path.join(os.path.expanduser("~"), ".epic_quest", "analytics")
+
+# One row per finished action, in the order they happened
+HISTORY_COLUMNS = ("seconds", "action", "count", "level", "xp", "total_xp", "gold",
+                   "active_quests")
+# One row per quest accepted or completed
+QUEST_COLUMNS = ("seconds", "quest_id", "kind", "quest_level", "event")
+# Rows kept in each log before the oldest are dropped
+MAX_ROWS = 50000
+
+
+class SessionHistory:
+    # Compact record of the session for the analytics report. Rows are plain
+    # tuples on the Tk thread; pandas only sees them when a report is built.
+    # Both logs are bounded so a long-running session stays flat in memory.
+    def __init__(self, engine, max_rows=MAX_ROWS):
+        self.engine = engine
+        self.rows = deque(maxlen=max_rows)
+        self.quest_events = deque(maxlen=max_rows)
+        self.started = time.monotonic()
+        # Quest id -> (kind, level) as of the last action
+        self.known = {}
+        self.quests_changed = False
+        engine.on(self.on_engine_event)
+
+    def reset(self):
+        # Start over from the game as it is now, after a new game or a load
+        self.rows.clear()
+        self.quest_events.clear()
+        self.started = time.monotonic()
+        self.known = {q.id: (q.kind, q.level) for q in self.engine.player.quests.values()}
+        self.quests_changed = False
+        self.record("start", 0)
+
+    def on_engine_event(self, event, *args):
+        if event == "changed":
+            if args[0] == "quests":
+                self.quests_changed = True
+        elif event == "action":
+            name, *outcome = args
+            self.record(name, len(outcome[0]) if name.endswith("_batch") else 1)
+
+    def record(self, action, count=1):
+        player = self.engine.player
+        now = time.monotonic() - self.started
+        if self.quests_changed:
+            self.diff_quests(now, player.quests)
+        total_xp = self.engine.catalog.levels.start(player.level) + player.xp
+        self.rows.append((now, action, count, player.level, player.xp, total_xp, player.gold,
+                          len(player.quests)))
+
+    def diff_quests(self, now, quests):
+        # Quests that appeared were accepted; ones that left were completed
+        known = self.known
+        for quest_id in [q for q in known if q not in quests]:
+            kind, level = known.pop(quest_id)
+            self.quest_events.append((now, quest_id, kind, level, "completed"))
+        for quest_id, quest in quests.items():
+            if quest_id not in known:
+                known[quest_id] = (quest.kind, quest.level)
+                self.quest_events.append((now, quest_id, quest.kind, quest.level, "accepted"))
+        self.quests_changed = False
+
+    def snapshot(self):
+        return list(self.rows), list(self.quest_events)
+
+
+def build_frames(rows, quest_events, catalog):
+    import pandas as pd
+
+    history = pd.DataFrame(rows, columns=HISTORY_COLUMNS)
+    history["action_number"] = history["count"].cumsum()
+
+    quests = pd.DataFrame(quest_events, columns=QUEST_COLUMNS)
+    names = {kind: qt.name for kind, qt in enumerate(catalog.quest_types)}
+    quests["kind"] = quests["kind"].map(names)
+    rates = (quests.groupby(["kind", "event"]).size().unstack("event", fill_value=0)
+             .reindex(index=list(names.values()), columns=["accepted", "completed"], fill_value=0))
+    # Quests held from before the session started complete without an
+    # accepted row, so the rate is capped at 1
+    rates["completion_rate"] = (rates["completed"] / rates["accepted"].where(rates["accepted"] > 0)
+                                ).clip(upper=1.0)
+    return history, rates
+
+
+def build_report(rows, quest_events, catalog, name, directory=ANALYTICS_DIR):
+    # Runs on a worker thread. Imports pandas and plotly on first use, writes
+    # a standalone HTML report and returns (path, summary).
+    from plotly.subplots import make_subplots
+
+    history, rates = build_frames(rows, quest_events, catalog)
+
+    fig = make_subplots(rows=3, cols=1, vertical_spacing=0.08,
+                        subplot_titles=("XP and level", "Gold", "Quest completion"),
+                        specs=[[{"secondary_y": True}], [{}], [{}]])
+    x = history["seconds"]
+    fig.add_scatter(x=x, y=history["total_xp"], name="Total XP", row=1, col=1)
+    fig.add_scatter(x=x, y=history["level"], name="Level", line_shape="hv",
+                    row=1, col=1, secondary_y=True)
+    fig.add_scatter(x=x, y=history["gold"], name="Gold", row=2, col=1)
+    fig.add_bar(x=rates.index, y=rates["accepted"], name="Accepted", row=3, col=1)
+    fig.add_bar(x=rates.index, y=rates["completed"], name="Completed", row=3, col=1,
+                text=[f"{r:.0%}" if r == r else "" for r in rates["completion_rate"]])
+    fig.update_xaxes(title_text="Seconds into session", row=2, col=1)
+    fig.update_yaxes(title_text="Level", secondary_y=True, row=1, col=1)
+    fig.update_layout(title=f"{name} — session analytics", height=1000, template="plotly_dark",
+                      barmode="group")
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"session-{time.strftime('%Y%m%d-%H%M%S')}.html")
+    fig.write_html(path, include_plotlyjs=True)
+
+    last = history.iloc[-1]
+    summary = {
+        "actions": int(last["action_number"]),
+        "minutes": float(last["seconds"]) / 60,
+        "levels": int(last["level"] - history["level"].iloc[0]),
+        "gold": int(last["gold"] - history["gold"].iloc[0]),
+        "quests": [(kind, int(row.accepted), int(row.completed),
+                    float(row.completion_rate))
+                   for kind, row in rates.iterrows()],
+    }
+    return path, summary
@@ -0,0 +1,142 @@
+import time
+from collections import deque
+
+
+class Tween:
+    __slots__ = ("item", "sprite", "x", "y", "dx", "dy", "frames", "droppable")
+
+    def __init__(self, item, sprite, x, y, dx, dy, frames, droppable):
+        self.item = item
+        # Keeps the PhotoImage alive while shown, even if the cache evicts it
+        self.sprite = sprite
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.frames = frames
+        self.droppable = droppable
+
+
+class Animator:
+    # Drives every overlay animation from one frame callback on the game
+    # clock. Canvas items are recycled through pools of hidden text and image
+    # items instead of being created and deleted per effect. With a sprite
+    # cache, glyphs it can render are drawn as image items.
+    def __init__(self, clock, canvas, frame_ms=50, frame_budget=0.6,
+                 max_tweens=80, pool_size=100, sprites=None):
+        self.clock = clock
+        self.canvas = canvas
+        self.sprites = sprites
+        self.frame_ms = frame_ms
+        # Fraction of the frame interval a tick may use before droppable
+        # tweens are shed
+        self.frame_budget = frame_budget * frame_ms / 1000
+        self.max_tweens = max_tweens
+        self.pool_size = pool_size
+
+        self.tweens = deque()
+        self.pool = []
+        self.image_pool = []
+        self.job = None
+        self.overloaded = False
+        self.dropped = 0
+
+    def acquire(self, x, y, text, fill, font):
+        # Returns (canvas item, sprite or None)
+        sprite = self.sprites.get(text, fill, font) if self.sprites is not None else None
+        if sprite is not None:
+            if self.image_pool:
+                item = self.image_pool.pop()
+                self.canvas.coords(item, x, y)
+                self.canvas.itemconfigure(item, image=sprite, state='normal')
+                return item, sprite
+            return self.canvas.create_image(x, y, image=sprite), sprite
+
+        if self.pool:
+            item = self.pool.pop()
+            self.canvas.coords(item, x, y)
+            self.canvas.itemconfigure(item, text=text, fill=fill, font=font, state='normal')
+            return item, None
+        return self.canvas.create_text(x, y, text=text, fill=fill, font=font), None
+
+    def release(self, tween):
+        pool = self.pool if tween.sprite is None else self.image_pool
+        if len(pool) < self.pool_size:
+            self.canvas.itemconfigure(tween.item, state='hidden')
+            pool.append(tween.item)
+        else:
+            self.canvas.delete(tween.item)
+
+    def add_text(self, x, y, text, fill, font, frames, dx=0, dy=0, droppable=True):
+        # Show text at (x, y), move it by (dx, dy) per frame and remove it
+        # after `frames` frames. Droppable tweens are skipped while the
+        # animator is over budget.
+        if droppable and self.overloaded:
+            self.dropped += 1
+            return None
+
+        if len(self.tweens) >= self.max_tweens and not self.shed(1):
+            if droppable:
+                self.dropped += 1
+                return None
+
+        item, sprite = self.acquire(x, y, text, fill, font)
+        tween = Tween(item, sprite, x, y, dx, dy, frames, droppable)
+        self.tweens.append(tween)
+        self.start()
+        return tween
+
+    def shed(self, count):
+        # Drop the oldest droppable tweens, return how many were dropped
+        kept = deque()
+        shed = 0
+        while self.tweens:
+            tween = self.tweens.popleft()
+            if shed < count and tween.droppable:
+                self.release(tween)
+                shed += 1
+            else:
+                kept.append(tween)
+        self.tweens = kept
+        self.dropped += shed
+        return shed
+
+    def start(self):
+        if self.job is None:
+            self.job = self.clock.after(self.frame_ms, self.tick)
+
+    def stop(self):
+        if self.job is not None:
+            self.clock.cancel(self.job)
+            self.job = None
+        # Overload is judged by running frames; with none left it is stale
+        self.overloaded = False
+
+    def tick(self):
+        self.job = None
+        start = time.perf_counter()
+
+        remaining = deque()
+        for tween in self.tweens:
+            tween.frames -= 1
+            if tween.frames <= 0:
+                self.release(tween)
+                continue
+            if tween.dx or tween.dy:
+                tween.x += tween.dx
+                tween.y += tween.dy
+                self.canvas.coords(tween.item, tween.x, tween.y)
+            remaining.append(tween)
+        self.tweens = remaining
+
+        # Over budget: shed half of the live tweens and skip new droppable
+        # ones until a frame fits again
+        self.overloaded = time.perf_counter() - start > self.frame_budget
+        if self.overloaded:
+            self.shed(len(self.tweens) // 2)
+
+        if self.tweens:
+            self.start()
+        else:
+            # No frame follows to clear it, and nothing is left to slow down
+            self.overloaded = False
@@ -0,0 +1,145 @@
+import json
+import os
+import zlib
+from bisect import bisect_right
+from collections import namedtuple
+from types import MappingProxyType
+
+from rpg_models import COLLECT, HUNT
+
+CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content.json")
+
+# Journal records store a quest's need in 16 bits
+MAX_NEED = 0xFFFF
+
+# Rewards are linear in the quest's level: base + per_level * level
+QuestType = namedtuple("QuestType", "name verb need_min need_max xp_base xp_per_level "
+                                    "gold_base gold_per_level")
+
+
+class LevelCurve:
+    # XP needed for each level-up, each step `growth` times the last
+    # (truncated, as the game always has). totals[i] is the cumulative XP at
+    # which level i + 1 starts, so any XP total resolves to its level with
+    # one bisect. The table extends itself if a total runs past the end.
+    def __init__(self, first_xp=100, growth=1.5, levels=100):
+        self.growth = growth
+        self.steps = [first_xp]
+        self.totals = [0]
+        self.extend(levels)
+
+    def extend(self, levels):
+        steps = self.steps
+        totals = self.totals
+        while len(totals) < levels:
+            totals.append(totals[-1] + steps[-1])
+            steps.append(max(1, int(steps[-1] * self.growth)))
+
+    def start(self, level):
+        # Cumulative XP at which this level starts
+        if level > len(self.totals):
+            self.extend(level)
+        return self.totals[level - 1]
+
+    def step(self, level):
+        # XP needed to go from this level to the next
+        if level > len(self.steps):
+            self.extend(level)
+        return self.steps[level - 1]
+
+    def level_for(self, total):
+        while total >= self.totals[-1] + self.steps[-1]:
+            self.extend(2 * len(self.totals))
+        return bisect_right(self.totals, total)
+
+
+def read_content(path=CONTENT_PATH):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class Catalog:
+    # Game content compiled once into flat tuples indexed by id, plus
+    # read-only name -> id maps. Enemy and item ids are their position in the
+    # data file, so appending entries keeps existing ids stable.
+    __slots__ = ("enemies", "enemy_ids", "enemy_emoji", "enemy_xp", "enemy_gold",
+                 "items", "item_ids", "item_emoji", "quest_types", "quest_targets",
+                 "levels", "colors", "hover_colors", "checksum", "rules")
+
+    def __init__(self, data):
+        default_emoji = data.get("default_emoji", {})
+
+        enemies = data["enemies"]
+        self.enemies = tuple(e["name"] for e in enemies)
+        self.enemy_ids = self.intern("enemy", self.enemies)
+        self.enemy_emoji = tuple(e.get("emoji", default_emoji.get("enemy", "")) for e in enemies)
+        self.enemy_xp = tuple(int(e["xp"]) for e in enemies)
+        self.enemy_gold = tuple(int(e["gold"]) for e in enemies)
+
+        items = data["items"]
+        self.items = tuple(i["name"] for i in items)
+        self.item_ids = self.intern("item", self.items)
+        self.item_emoji = tuple(i.get("emoji", default_emoji.get("item", "")) for i in items)
+
+        # Quest kinds are game mechanics, so their ids are fixed in
+        # rpg_models; the data file only tunes them
+        quest_types = [None, None]
+        for name, kind in (("hunt", HUNT), ("collect", COLLECT)):
+            qt = data["quest_types"][name]
+            need_min, need_max = qt["need"]
+            if not 1 <= need_min <= need_max <= MAX_NEED:
+                raise ValueError(f"{name} quest need must be 1 to {MAX_NEED}, "
+                                 f"lowest first, got {qt['need']!r}")
+            quest_types[kind] = QuestType(name, qt["verb"], *qt["need"], *qt["xp"], *qt["gold"])
+        self.quest_types = tuple(quest_types)
+        self.quest_targets = (self.enemies, self.items)
+
+        levels = data.get("levels", {})
+        self.levels = LevelCurve(levels.get("first_xp", 100), levels.get("growth", 1.5))
+
+        colors = data["colors"]
+        self.colors = MappingProxyType(dict(colors))
+        # Keyed by colour value, the way widgets report their background
+        self.hover_colors = MappingProxyType(
+            {colors[name]: hover for name, hover in data.get("hover_colors", {}).items()})
+
+        # Everything that decides a roll or a reward; names, emojis and
+        # colours are cosmetic and can change without breaking saves
+        self.rules = ([levels.get("first_xp", 100), levels.get("growth", 1.5)],
+                      [list(qt[2:]) for qt in self.quest_types],
+                      [[xp, gold] for xp, gold in zip(self.enemy_xp, self.enemy_gold)])
+        self.checksum = self.rules_checksum(len(self.enemies), len(self.items))
+
+    @staticmethod
+    def intern(kind, names):
+        ids = {}
+        for i, name in enumerate(names):
+            if name in ids:
+                raise ValueError(f"Duplicate {kind} in content: {name!r}")
+            ids[name] = i
+        if not ids:
+            raise ValueError(f"Content has no {kind} entries")
+        return MappingProxyType(ids)
+
+    def rules_checksum(self, n_enemies, n_items):
+        # Identifies the rules of a game that rolls among the first n_enemies
+        # enemies and n_items items. Appending entries leaves the checksum of
+        # the old counts unchanged, so saves made before the append still load.
+        levels, quest_types, enemies = self.rules
+        canonical = json.dumps([levels, quest_types, enemies[:n_enemies], n_items])
+        return zlib.crc32(canonical.encode("ascii"))
+
+    def quest_title(self, kind, target, need):
+        return f"{self.quest_types[kind].verb} {need} {self.quest_targets[kind][target]}(s)"
+
+
+_loaded = {}
+
+
+def load_catalog(path=CONTENT_PATH):
+    # Each content file is read and compiled once per process
+    path = os.path.abspath(path)
+    catalog = _loaded.get(path)
+    if catalog is None:
+        catalog = _loaded[path] = Catalog(read_content(path))
+    return catalog
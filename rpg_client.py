@@ -0,0 +1,133 @@
+import json
+import socket
+from array import array
+
+from rpg_catalog import load_catalog
+from rpg_models import Inventory, Player, Quest
+
+DEFAULT_PORT = 8765
+
+
+class ServerError(Exception):
+    pass
+
+
+class Connection:
+    # Blocking request/reply over one socket, one JSON message per line
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=10):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rwb")
+
+    def call(self, msg):
+        self.file.write(json.dumps(msg, separators=(",", ":")).encode() + b"\n")
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Server closed the connection")
+        reply = json.loads(line)
+        if "error" in reply:
+            raise ServerError(reply["error"])
+        return reply
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def parse_address(address):
+    # HOST, HOST:PORT or :PORT
+    host, sep, port = address.rpartition(":")
+    if not sep:
+        host, port = address, ""
+    if port and not (port.isdigit() and 0 < int(port) < 65536):
+        raise ValueError(f"Bad server address {address!r}, expected HOST:PORT")
+    return (host or "127.0.0.1"), int(port or DEFAULT_PORT)
+
+
+class RemoteEngine:
+    # Client-side mirror of a hero that lives on a GameServer. It exposes the
+    # parts of GameEngine the views read (player, available_quests, catalog,
+    # quest_title) and replays each reply from the server as the same
+    # ("log"/"level_up"/"changed") events, so panels render it unchanged.
+    # Requests run on a single-worker WorkerPool, so they stay in order and
+    # replies are applied on the Tk thread.
+    def __init__(self, address, pool, catalog=None):
+        self.catalog = catalog if catalog is not None else load_catalog()
+        self.enemies = self.catalog.enemies
+        self.items = self.catalog.items
+        self.address = parse_address(address)
+        self.pool = pool
+        self.connection = None
+        self.player = None
+        self.available_quests = []
+        self.listeners = []
+
+    def on(self, callback):
+        self.listeners.append(callback)
+
+    def emit(self, event, *args):
+        for callback in self.listeners:
+            callback(event, *args)
+
+    def quest_title(self, quest):
+        return self.catalog.quest_title(quest.kind, quest.target, quest.need)
+
+    def join(self, name):
+        # Blocking: connect and fetch the hero's full state
+        self.connection = Connection(*self.address)
+        reply = self.connection.call({"op": "hello", "name": name,
+                                      "content": self.catalog.checksum})
+        self.player = Player(name, Inventory(len(self.items)))
+        self.apply(reply)
+
+    def request(self, op, callback=None, error=None, **args):
+        # callback(reply) runs on the Tk thread once the server has answered
+        self.pool.submit(self.connection.call, {"op": op, **args},
+                         callback=callback, error=error)
+
+    def apply(self, reply):
+        # A part comes whole ("quests", "inventory") or as the entries that
+        # changed; changes are reported with their ids, like GameEngine does
+        player = self.player
+        changed = []
+        if "stats" in reply:
+            player.name, player.level, player.xp, player.next_xp, player.gold = reply["stats"]
+            changed.append(("stats",))
+        if "quests" in reply:
+            player.quests = {q.id: q for q in map(Quest.from_fields, reply["quests"])}
+            changed.append(("quests",))
+        elif "quest_updates" in reply:
+            quests = player.quests
+            ids = []
+            for quest in map(Quest.from_fields, reply["quest_updates"]):
+                quests[quest.id] = quest
+                ids.append(quest.id)
+            for quest_id in reply["quests_removed"]:
+                quests.pop(quest_id, None)
+                ids.append(quest_id)
+            changed.append(("quests", ids))
+        if "available" in reply:
+            self.available_quests = [Quest.from_fields(q) for q in reply["available"]]
+        if "inventory" in reply:
+            player.inventory.counts = array("I", reply["inventory"])
+            changed.append(("inventory",))
+        elif "inventory_updates" in reply:
+            counts = player.inventory.counts
+            for item, count in reply["inventory_updates"]:
+                counts[item] = count
+            changed.append(("inventory", [item for item, _ in reply["inventory_updates"]]))
+
+        if not self.listeners:
+            return
+        for part in changed:
+            self.emit("changed", *part)
+        for message, color in reply.get("log", ()):
+            self.emit("log", message, color)
+        if "level_up" in reply:
+            self.emit("level_up", *reply["level_up"])
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,97 @@
+import heapq
+import time
+from itertools import count
+
+NORMAL = 1.0
+TURBO = 100.0
+MANUAL = 0.0
+
+
+class GameClock:
+    # Every game delay goes through here, in virtual milliseconds. With a
+    # positive scale virtual time runs that many times faster than the wall
+    # clock and timers are real root.after callbacks. With scale 0 (MANUAL)
+    # nothing fires on its own: tests and bots move time with advance().
+    def __init__(self, root, scale=NORMAL):
+        self.root = root
+        self.scale = scale
+        self.ids = count(1)
+        # timer id -> [due, func, args, tk job]
+        self.timers = {}
+        self.queue = []
+        self.virtual = 0.0
+        self.real = time.perf_counter()
+
+    def now(self):
+        if self.scale > 0:
+            return self.virtual + (time.perf_counter() - self.real) * 1000 * self.scale
+        return self.virtual
+
+    def after(self, ms, func, *args):
+        timer_id = next(self.ids)
+        due = self.now() + ms
+        self.timers[timer_id] = [due, func, args, None]
+        self.schedule(timer_id, ms)
+        return timer_id
+
+    def schedule(self, timer_id, delay):
+        timer = self.timers[timer_id]
+        if self.scale > 0:
+            timer[3] = self.root.after(max(1, round(delay / self.scale)),
+                                       self.firing(timer_id, timer[1]))
+        else:
+            heapq.heappush(self.queue, (timer[0], timer_id))
+
+    def cancel(self, timer_id):
+        timer = self.timers.pop(timer_id, None)
+        if timer is not None and timer[3] is not None:
+            self.root.after_cancel(timer[3])
+
+    def pending(self):
+        return len(self.timers)
+
+    def firing(self, timer_id, func):
+        # The Tk callback for one timer, named after the function it runs so
+        # the profiler reports Animator.tick rather than GameClock.fire
+        def fire():
+            self.fire(timer_id)
+        fire.__name__ = getattr(func, "__name__", fire.__name__)
+        fire.__qualname__ = getattr(func, "__qualname__", repr(func))
+        return fire
+
+    def fire(self, timer_id):
+        timer = self.timers.pop(timer_id, None)
+        if timer is not None:
+            timer[1](*timer[2])
+
+    def set_scale(self, scale):
+        # Re-time everything still pending under the new scale
+        self.virtual = self.now()
+        self.real = time.perf_counter()
+        self.scale = scale
+        self.queue = []
+        for timer_id, timer in self.timers.items():
+            if timer[3] is not None:
+                self.root.after_cancel(timer[3])
+                timer[3] = None
+            self.schedule(timer_id, max(0.0, timer[0] - self.virtual))
+
+    def advance(self, ms):
+        # Manual mode: run every timer due within the next ms, in order
+        target = self.virtual + ms
+        while self.queue and self.queue[0][0] <= target:
+            due, timer_id = heapq.heappop(self.queue)
+            if timer_id in self.timers:
+                self.virtual = max(self.virtual, due)
+                self.fire(timer_id)
+        self.virtual = target
+
+    def step(self):
+        # Manual mode: jump straight to the next timer and run it
+        while self.queue:
+            due, timer_id = heapq.heappop(self.queue)
+            if timer_id in self.timers:
+                self.virtual = max(self.virtual, due)
+                self.fire(timer_id)
+                return True
+        return False
@@ -0,0 +1,434 @@
+import random
+import time
+from collections import Counter, deque
+from threading import Lock
+
+from rpg_catalog import load_catalog
+from rpg_models import ACTIVE, COLLECT, DONE, HUNT, Inventory, Player, Quest
+
+
+class GameEngine:
+    # Game rules without any display. Views subscribe with on() and receive
+    # ("log", message, color), ("level_up", level, levels_gained) and
+    # ("changed", part) events, where part is "stats", "quests" or
+    # "inventory". A change from play also carries the ids it touched,
+    # quest ids or item ids: ("changed", "quests", quest_ids); without them
+    # any part of it may have changed. Every finished player action is also reported as
+    # ("action", name, *outcome) with enough detail to apply it again
+    # without rolling any dice. Enemies, items and quest kinds travel as
+    # integer ids; the content catalog maps them back to names, emojis and
+    # rewards.
+    def __init__(self, rng=None, catalog=None):
+        self.catalog = catalog if catalog is not None else load_catalog()
+        self.enemies = self.catalog.enemies
+        self.items = self.catalog.items
+        # Enemies and items the dice pick from, by quest kind. A game saved
+        # before entries were appended keeps the old counts until it is
+        # resized, so its journal replays with the same rolls.
+        self.target_counts = (len(self.enemies), len(self.items))
+
+        self.rng = rng if rng is not None else random.Random()
+        # Quests roll from their own stream so they can be generated ahead of
+        # time on another thread without disturbing the combat rolls. Rolls
+        # are buffered in order, so pre-generating never changes the sequence.
+        self.quest_rng = random.Random(self.rng.getrandbits(64))
+        self.quest_buffer = deque()
+        self.quest_lock = Lock()
+        self.player = None
+        self.available_quests = []
+        self.listeners = []
+
+        # Active quests per kind, by target id -> {quest id: quest}, so an
+        # action only touches the quests it can advance
+        self.quest_index = ({}, {})
+        self.next_quest_id = 1
+
+    def on(self, callback):
+        self.listeners.append(callback)
+
+    def emit(self, event, *args):
+        for callback in self.listeners:
+            callback(event, *args)
+
+    def log(self, message, color=None):
+        if self.listeners:
+            self.emit("log", message, color)
+
+    def changed(self, part, *ids):
+        if self.listeners:
+            self.emit("changed", part, *ids)
+
+    def action(self, name, *outcome):
+        if self.listeners:
+            self.emit("action", name, *outcome)
+
+    def seed(self, seed):
+        self.rng.seed(seed)
+        with self.quest_lock:
+            self.quest_rng.seed(self.rng.getrandbits(64))
+            self.quest_buffer.clear()
+
+    def set_content_size(self, n_enemies, n_items, quest_seed=None):
+        # Quests already rolled ahead used the old counts, so a resize also
+        # restarts the quest stream from a recorded seed
+        self.target_counts = (n_enemies, n_items)
+        if self.player is not None:
+            self.player.inventory.grow(n_items)
+        if quest_seed is not None:
+            with self.quest_lock:
+                self.quest_rng.seed(quest_seed)
+                self.quest_buffer.clear()
+
+    def new_game(self, name):
+        self.player = self.make_player(name)
+        self.quest_index = ({}, {})
+        self.available_quests = [self.make_quest(self.player.level) for _ in range(3)]
+        self.refresh()
+
+    def refresh(self):
+        for part in ("stats", "quests", "inventory"):
+            self.changed(part)
+
+    def restore(self, player, available_quests, next_quest_id):
+        # Load saved state and rebuild the derived quest index
+        self.player = player
+        self.available_quests = available_quests
+        self.next_quest_id = next_quest_id
+        self.quest_index = ({}, {})
+        player.inventory.grow(self.target_counts[COLLECT])
+        for quest in player.quests.values():
+            if quest.status == ACTIVE:
+                self.index_quest(quest)
+        self.refresh()
+
+    def make_player(self, name):
+        return Player(name, Inventory(self.target_counts[COLLECT]))
+
+    def roll_quest(self):
+        # Caller holds quest_lock
+        rng = self.quest_rng
+        kind = rng.randrange(len(self.catalog.quest_types))
+        qt = self.catalog.quest_types[kind]
+        target = rng.randrange(self.target_counts[kind])
+        return kind, target, rng.randint(qt.need_min, qt.need_max)
+
+    def pregenerate_quests(self, count):
+        # Safe to call from a worker thread
+        with self.quest_lock:
+            while len(self.quest_buffer) < count:
+                self.quest_buffer.append(self.roll_quest())
+            return len(self.quest_buffer)
+
+    def quest_stream_state(self):
+        with self.quest_lock:
+            return self.quest_rng.getstate(), list(self.quest_buffer)
+
+    def set_quest_stream_state(self, state):
+        rng_state, buffered = state
+        with self.quest_lock:
+            self.quest_rng.setstate(rng_state)
+            self.quest_buffer = deque(buffered)
+
+    def make_quest(self, level):
+        with self.quest_lock:
+            if self.quest_buffer:
+                kind, target, need = self.quest_buffer.popleft()
+            else:
+                kind, target, need = self.roll_quest()
+        return self.build_quest(kind, target, need, level)
+
+    def build_quest(self, kind, target, need, level, quest_id=None):
+        if quest_id is None:
+            quest_id = self.next_quest_id
+        self.next_quest_id = max(self.next_quest_id, quest_id + 1)
+
+        qt = self.catalog.quest_types[kind]
+        return Quest(quest_id, kind, target, need, level, qt.xp_base + qt.xp_per_level * level,
+                     qt.gold_base + qt.gold_per_level * level)
+
+    def quest_title(self, quest):
+        return self.catalog.quest_title(quest.kind, quest.target, quest.need)
+
+    def start_fight(self):
+        catalog = self.catalog
+        enemy = self.rng.randrange(self.target_counts[HUNT])
+        xp_gain = catalog.enemy_xp[enemy]
+        gold_gain = catalog.enemy_gold[enemy]
+
+        if self.listeners:
+            self.log(f"⚔️ Fighting {catalog.enemy_emoji[enemy]} {self.enemies[enemy]}...")
+
+        return enemy, xp_gain, gold_gain
+
+    def complete_fight(self, enemy, xp_gain, gold_gain):
+        if self.listeners:
+            self.log(f"🎯 Defeated {self.enemies[enemy]}! +{xp_gain} XP, +{gold_gain} Gold")
+        self.add_xp(xp_gain)
+        self.player.gold += gold_gain
+        self.changed("stats")
+
+        # Update hunt quests
+        self.advance_quests(HUNT, enemy)
+        self.action("fight", enemy, xp_gain, gold_gain)
+
+    def start_explore(self):
+        item = self.rng.randrange(self.target_counts[COLLECT])
+        self.log(f"🔍 Exploring...")
+        return item
+
+    def complete_explore(self, item):
+        if self.listeners:
+            self.log(f"🎁 Found {self.catalog.item_emoji[item]} {self.items[item]}!")
+        self.player.inventory.counts[item] += 1
+        self.changed("inventory", (item,))
+
+        # Update collect quests
+        self.advance_quests(COLLECT, item)
+        self.action("explore", item)
+
+    def start_fights(self, count):
+        # The same rolls as count calls to start_fight()
+        randrange = self.rng.randrange
+        n = self.target_counts[HUNT]
+        enemies = [randrange(n) for _ in range(count)]
+        self.log(f"⚔️ Fighting {count} battles...")
+        return enemies
+
+    def complete_fights(self, enemies):
+        # Resolve a run of fights in one pass: the end state matches
+        # complete_fight() called for each, but rewards and quest progress
+        # are applied once and reported in a single log line
+        catalog = self.catalog
+        counts = Counter(enemies)
+        xp_gain = gold_gain = 0
+        for enemy, n in counts.items():
+            xp_gain += catalog.enemy_xp[enemy] * n
+            gold_gain += catalog.enemy_gold[enemy] * n
+        quests = self.advance_quests_by(HUNT, counts)
+        gained = self.resolve_batch(xp_gain, gold_gain, quests)
+
+        if self.listeners:
+            foes = ", ".join(f"{self.enemies[e]} ×{n}" for e, n in counts.most_common(3))
+            more = ", …" if len(counts) > 3 else ""
+            self.log(f"🎯 Won {len(enemies)} fights ({foes}{more}): +{xp_gain} XP, "
+                     f"+{gold_gain} Gold{self.quest_summary(quests)}")
+        if gained:
+            self.announce_level_up(gained)
+        self.action("fight_batch", enemies)
+
+    def start_explores(self, count):
+        # The same rolls as count calls to start_explore()
+        randrange = self.rng.randrange
+        n = self.target_counts[COLLECT]
+        items = [randrange(n) for _ in range(count)]
+        self.log(f"🔍 Exploring {count} times...")
+        return items
+
+    def complete_explores(self, items):
+        counts = Counter(items)
+        inventory = self.player.inventory.counts
+        for item, n in counts.items():
+            inventory[item] += n
+        self.changed("inventory", list(counts))
+        quests = self.advance_quests_by(COLLECT, counts)
+        gained = self.resolve_batch(0, 0, quests)
+
+        if self.listeners:
+            emoji = self.catalog.item_emoji
+            found = ", ".join(f"{emoji[i]} {self.items[i]} ×{n}" for i, n in counts.most_common(3))
+            more = ", …" if len(counts) > 3 else ""
+            self.log(f"🎁 Explored {len(items)} times ({found}{more})"
+                     f"{self.quest_summary(quests)}")
+        if gained:
+            self.announce_level_up(gained)
+        self.action("explore_batch", items)
+
+    def advance_quests_by(self, kind, counts):
+        # counts maps target id -> times hit. Returns the quests completed.
+        by_target = self.quest_index[kind]
+        touched = []
+        completed = []
+        for target, n in counts.items():
+            matching = by_target.get(target)
+            if not matching:
+                continue
+            touched.extend(matching)
+            for q in matching.values():
+                q.done += n
+                if q.done >= q.need:
+                    completed.append(q)
+        if touched:
+            self.changed("quests", touched)
+        for q in completed:
+            q.done = q.need
+            q.status = DONE
+            self.retire_quest(q)
+        return completed
+
+    def resolve_batch(self, xp_gain, gold_gain, quests):
+        # XP carries over between levels, so the batch's rewards can be
+        # granted as one sum. Returns the levels gained.
+        for q in quests:
+            xp_gain += q.xp
+            gold_gain += q.gold
+        self.player.gold += gold_gain
+        self.changed("stats")
+        return self.grant_xp(xp_gain) if xp_gain else 0
+
+    def quest_summary(self, quests):
+        if not quests:
+            return ""
+        return f", {len(quests)} quest{'s' if len(quests) > 1 else ''} completed"
+
+    def advance_quests(self, kind, target):
+        matching = self.quest_index[kind].get(target)
+        if not matching:
+            return
+        self.changed("quests", list(matching))
+
+        completed = []
+        for q in matching.values():
+            q.done += 1
+            if q.done >= q.need:
+                completed.append(q)
+
+        for q in completed:
+            q.status = DONE
+            if self.listeners:
+                self.log(f"✅ Quest Completed: {self.quest_title(q)}")
+            self.complete_quest(q)
+
+    def add_xp(self, amount):
+        gained = self.grant_xp(amount)
+        self.log(f"⭐ Gained {amount} XP!", "blue")
+        if gained:
+            self.announce_level_up(gained)
+
+    def grant_xp(self, amount):
+        # Returns the number of levels gained
+        player = self.player
+        player.xp += amount
+        self.changed("stats")
+        if player.xp < player.next_xp:
+            return 0
+
+        # Resolve any number of level-ups at once, keeping the overflow
+        levels = self.catalog.levels
+        total = levels.start(player.level) + player.xp
+        level = levels.level_for(total)
+        gained = level - player.level
+        player.level = level
+        player.xp = total - levels.start(level)
+        player.next_xp = levels.step(level)
+        return gained
+
+    def announce_level_up(self, gained):
+        level = self.player.level
+        if gained > 1:
+            self.log(f"🎉 LEVEL UP x{gained}! You are now level {level}!", "gold")
+        else:
+            self.log(f"🎉 LEVEL UP! You are now level {level}!", "gold")
+        if self.listeners:
+            self.emit("level_up", level, gained)
+
+    def complete_quest(self, quest):
+        self.add_xp(quest.xp)
+        self.player.gold += quest.gold
+        self.retire_quest(quest)
+        self.changed("stats")
+        self.changed("quests", (quest.id,))
+
+    def retire_quest(self, quest):
+        del self.player.quests[quest.id]
+        self.unindex_quest(quest)
+
+    def collect_done_quests(self):
+        completed = [q for q in self.player.quests.values() if q.status == DONE]
+        for quest in completed:
+            self.complete_quest(quest)
+        self.action("complete_quest")
+
+    def index_quest(self, quest):
+        self.quest_index[quest.kind].setdefault(quest.target, {})[quest.id] = quest
+
+    def unindex_quest(self, quest):
+        by_target = self.quest_index[quest.kind]
+        matching = by_target.get(quest.target)
+        if matching is not None:
+            matching.pop(quest.id, None)
+            if not matching:
+                del by_target[quest.target]
+
+    def accept_quest(self, quest, replacement=None):
+        quest.status = ACTIVE
+        self.player.quests[quest.id] = quest
+        self.index_quest(quest)
+        self.changed("quests", (quest.id,))
+
+        # Replace with new quest
+        index = self.available_quests.index(quest)
+        if replacement is None:
+            replacement = self.make_quest(self.player.level)
+        self.available_quests[index] = replacement
+
+        if self.listeners:
+            self.log(f"📝 Accepted quest: {self.quest_title(quest)}")
+        self.action("accept_quest", index, replacement)
+
+    def step(self, action, slot=0):
+        # slot picks which available quest accept_quest takes; it is the
+        # player's choice, so it never comes from the game's rng
+        if action == "fight":
+            self.complete_fight(*self.start_fight())
+        elif action == "explore":
+            self.complete_explore(self.start_explore())
+        elif action == "accept_quest":
+            self.accept_quest(self.available_quests[slot])
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+
+ACTIONS = ("fight", "explore", "accept_quest")
+
+
+def simulate(n_actions, seed=None, weights=(1, 1, 1), name="Simulated Hero"):
+    # Run n_actions random fight/explore/accept_quest steps headlessly
+    engine = GameEngine(random.Random(seed))
+    engine.new_game(name)
+
+    # Actions come from their own stream so they don't consume the rules' rolls
+    chooser = random.Random(None if seed is None else f"actions-{seed}")
+    actions = chooser.choices(ACTIONS, weights=weights, k=n_actions)
+    slots = chooser.choices(range(len(engine.available_quests)), k=n_actions)
+
+    start = time.perf_counter()
+    for action, slot in zip(actions, slots):
+        engine.step(action, slot)
+    elapsed = time.perf_counter() - start
+
+    player = engine.player
+    return {
+        "actions": n_actions,
+        "seed": seed,
+        "level": player.level,
+        "xp": player.xp,
+        "next_xp": player.next_xp,
+        "gold": player.gold,
+        "inventory": {engine.items[item]: count for item, count in enumerate(player.inventory.counts)},
+        "active_quests": len(player.quests),
+        "elapsed": elapsed,
+        "actions_per_sec": n_actions / elapsed if elapsed else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a headless game simulation")
+    parser.add_argument("n_actions", type=int, nargs="?", default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    result = simulate(args.n_actions, args.seed)
+    for key, value in result.items():
+        print(f"{key}: {value}")
@@ -2,41 +2,108 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import random
 import time
-from threading import Thread
+
+from rpg_analytics import MAX_ROWS, SessionHistory, build_report
+from rpg_anim import Animator
+from rpg_catalog import CONTENT_PATH, load_catalog
+from rpg_clock import NORMAL, TURBO, GameClock
+from rpg_engine import GameEngine
+from rpg_log import LOG_DIR, ActivityLog, LogView
+from rpg_models import ACTIVE
+from rpg_profiler import Profiler
+from rpg_save import SAVE_DIR, SEED_LIMIT, SaveError, SaveGame
+from rpg_sprites import SpriteCache
+from rpg_worker import WorkerPool
+
+# Choices for the repeat selector; FIGHT and EXPLORE resolve that many as one batch
+REPEAT_COUNTS = (1, 5, 10, 25, 100)
 
 class AnimatedRPG:
-    def __init__(self):
+    def __init__(self, player_name=None, log_dir=LOG_DIR, save_dir=SAVE_DIR, seed=None,
+                 profile=False, speed=NORMAL, catalog=None, server=None, history_rows=MAX_ROWS):
         self.root = tk.Tk()
         self.root.title("🗡️ Epic Quest Adventure")
         self.root.geometry("1000x700")
         self.root.configure(bg='#1a1a2e')
         self.root.resizable(False, False)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # All game delays run on this clock; F6 toggles turbo
+        self.clock = GameClock(self.root, speed)
+        self.root.bind('<F6>', lambda e: self.toggle_turbo())
+        
+        # Background threads: general work, and one ordered lane for disk writes
+        self.workers = WorkerPool(self.root, workers=2, name="worker")
+        self.io = WorkerPool(self.root, workers=1, name="io")
+        
+        # Game rules, run here or, with a server address, on a GameServer
+        # that this window only sends actions to
+        if server:
+            # Networking is only loaded for remote play
+            from rpg_client import RemoteEngine
+            
+            self.remote = RemoteEngine(server, self.io, catalog)
+            self.engine = self.remote
+        else:
+            self.remote = None
+            self.engine = GameEngine(random.Random(seed), catalog)
+        self.seed = seed
+        self.engine.on(self.on_engine_event)
+        # Action history for the analytics panel, at most history_rows
+        # actions and quest events
+        self.history = SessionHistory(self.engine, history_rows)
+        self.analytics_pending = False
+        
+        # Autosave journal, disabled when save_dir is None; the server keeps
+        # remote heroes
+        self.save = SaveGame(self.engine, save_dir, io=self.io) if save_dir and not server else None
+        
+        # Color scheme, from the content catalog
+        self.colors = self.engine.catalog.colors
+        self.hover_colors = self.engine.catalog.hover_colors
         
-        # Game data
-        self.enemies = ["goblin", "orc", "skeleton", "dragon"]
-        self.items = ["potion", "sword", "shield", "gold"]
-        self.quest_types = ["hunt", "collect"]
-        
-        # Color scheme
-        self.colors = {
-            'bg': '#1a1a2e',
-            'card': '#16213e',
-            'accent': '#0f3460',
-            'gold': '#ffd700',
-            'green': '#4ade80',
-            'red': '#ef4444',
-            'blue': '#3b82f6',
-            'purple': '#8b5cf6',
-            'text': '#e5e7eb'
-        }
-        
-        self.player = None
-        self.available_quests = []
         self.animation_queue = []
+        # Cosmetic randomness only, so effects never shift the game's rolls
+        self.fx_rng = random.Random()
+        self.pending_action = None
+        self.pending_job = None
+        self.activity_log = ActivityLog(log_dir)
+        
+        # Rendered panel widgets, keyed by quest id and item id
+        self.quest_widgets = {}
+        self.no_quests_label = None
+        self.inventory_widgets = {}
+        
+        # Panels waiting for the next idle repaint, and the quests that
+        # changed in order (None when any of them may have)
+        self.dirty = set()
+        self.dirty_quests = {}
+        self.render_job = None
         
         self.setup_styles()
         self.create_widgets()
-        self.start_game()
+        # Opt-in event-loop and render instrumentation
+        self.profiler = Profiler(self).install() if profile else None
+        self.start_game(player_name)
+        
+    @property
+    def player(self):
+        return self.engine.player
+        
+    @property
+    def available_quests(self):
+        return self.engine.available_quests
+        
+    def on_engine_event(self, event, *args):
+        if event == "log":
+            message, color = args
+            self.log_message(message, self.colors.get(color))
+        elif event == "level_up":
+            self.show_level_up_animation()
+        elif event == "changed":
+            if args[0] == "quests":
+                self.mark_quests_dirty(args[1] if len(args) > 1 else None)
+            self.mark_dirty(args[0])
         
     def setup_styles(self):
         style = ttk.Style()
@@ -104,6 +171,12 @@ class AnimatedRPG:
         self.animation_canvas.place(x=0, y=0, relwidth=1, relheight=1)
         self.animation_canvas.configure(state='disabled')
         
+        # Star and sparkle glyphs are pre-rendered so bursts draw images
+        self.sprites = SpriteCache(self.root)
+        self.sprites.warm([("⭐", self.colors['gold'], ('Arial', 16)),
+                           ("✨", self.colors['gold'], ('Arial', 12))])
+        self.animator = Animator(self.clock, self.animation_canvas, sprites=self.sprites)
+        
     def create_stats_section(self):
         tk.Label(self.stats_frame, text="🏰 HERO STATUS", 
                 bg=self.colors['card'], fg=self.colors['gold'],
@@ -149,6 +222,7 @@ class AnimatedRPG:
         ]
         
         self.action_buttons = []
+        self.action_commands = []
         for text, command, color in buttons:
             btn = tk.Button(parent, text=text, command=command,
                            bg=color, fg='white', font=('Arial', 11, 'bold'),
@@ -156,10 +230,30 @@ class AnimatedRPG:
                            activebackground=color, activeforeground='white')
             btn.pack(pady=5, padx=10, fill='x')
             self.action_buttons.append(btn)
+            self.action_commands.append((btn, command))
             
             # Hover effects
             btn.bind('<Enter>', lambda e, b=btn, c=color: self.on_button_hover(b, c))
             btn.bind('<Leave>', lambda e, b=btn, c=color: self.on_button_leave(b, c))
+            
+        # Repeat count for FIGHT and EXPLORE
+        repeat_frame = tk.Frame(parent, bg=self.colors['accent'])
+        repeat_frame.pack(pady=5, padx=10, fill='x')
+        tk.Label(repeat_frame, text="🔁 Repeat", bg=self.colors['accent'],
+                fg=self.colors['text'], font=('Arial', 10, 'bold')).pack(side='left')
+        self.repeat_var = tk.IntVar(value=REPEAT_COUNTS[0])
+        repeat_menu = tk.OptionMenu(repeat_frame, self.repeat_var, *REPEAT_COUNTS)
+        repeat_menu.configure(bg=self.colors['card'], fg=self.colors['text'],
+                              font=('Arial', 10), highlightthickness=0)
+        repeat_menu.pack(side='right')
+        
+        # Not an action, so it stays usable while one is in progress
+        color = self.colors['accent']
+        analytics = tk.Button(parent, text="📊 ANALYTICS", command=self.open_analytics,
+                              bg=self.colors['card'], fg=self.colors['text'],
+                              font=('Arial', 10, 'bold'), relief='raised', bd=2, padx=20, pady=4,
+                              activebackground=color, activeforeground='white')
+        analytics.pack(pady=5, padx=10, fill='x')
     
     def on_button_hover(self, button, color):
         button.configure(bg=self.lighten_color(color))
@@ -168,15 +262,7 @@ class AnimatedRPG:
         button.configure(bg=color)
         
     def lighten_color(self, color):
-        # Simple color lightening
-        colors_map = {
-            self.colors['red']: '#f87171',
-            self.colors['green']: '#86efac',
-            self.colors['blue']: '#60a5fa',
-            self.colors['purple']: '#a78bfa',
-            self.colors['gold']: '#fde047'
-        }
-        return colors_map.get(color, color)
+        return self.hover_colors.get(color, color)
     
     def create_quest_section(self, parent):
         tk.Label(parent, text="📜 ACTIVE QUESTS", bg=self.colors['card'], 
@@ -193,6 +279,10 @@ class AnimatedRPG:
         
         quest_canvas.create_window((0, 0), window=self.quest_frame, anchor="nw")
         
+        # Keep the scroll region in sync whenever the quest list resizes
+        self.quest_frame.bind("<Configure>", lambda e: quest_canvas.configure(
+            scrollregion=quest_canvas.bbox("all")))
+        
         self.quest_canvas = quest_canvas
         
     def create_inventory_and_log(self, parent):
@@ -221,278 +311,346 @@ class AnimatedRPG:
                                fg=self.colors['text'], font=('Courier', 10),
                                wrap='word', state='disabled')
         log_scroll = ttk.Scrollbar(text_frame, command=self.log_text.yview)
-        self.log_text.configure(yscrollcommand=log_scroll.set)
+        
+        # Keep only the recent lines in the widget, older ones page in from disk
+        self.log_view = LogView(self.root, self.log_text, log_scroll, self.activity_log)
         
         self.log_text.pack(side='left', fill='both', expand=True)
         log_scroll.pack(side='right', fill='y')
         
-    def start_game(self):
+    def start_game(self, name=None):
+        # Continue the saved hero unless a new one was asked for
+        if name is None and self.save is not None and self.save.exists():
+            try:
+                self.save.load()
+            except SaveError as e:
+                self.log_message(f"⚠️ Could not load save: {e}", self.colors['red'])
+                self.keep_unreadable_save()
+            else:
+                self.log_message(f"🌟 Welcome back {self.player.name}!")
+                self.history.reset()
+                self.pregenerate_quests()
+                self.animate_loop()
+                return
+        elif self.save is not None and self.save.incomplete():
+            self.log_message("⚠️ Found an incomplete save", self.colors['red'])
+            self.keep_unreadable_save()
+                
         # Get player name
-        name = tk.simpledialog.askstring("Hero Name", "Enter your hero name:", 
-                                        parent=self.root)
+        if name is None:
+            name = tk.simpledialog.askstring("Hero Name", "Enter your hero name:", 
+                                            parent=self.root)
         if not name:
             name = "Brave Adventurer"
             
-        self.player = self.make_player(name)
-        self.available_quests = [self.make_quest(self.player["level"]) for _ in range(3)]
+        if self.save is not None:
+            self.save.new_game(name, self.seed)
+        elif self.remote is not None:
+            from rpg_client import ServerError
+            
+            try:
+                self.remote.join(name)
+            except (OSError, ValueError, ServerError) as e:
+                self.log_message(f"⚠️ Could not join server: {e}", self.colors['red'])
+                self.disable_buttons()
+                self.animate_loop()
+                return
+        else:
+            self.engine.new_game(name)
         
-        self.update_display()
         self.log_message(f"🌟 Welcome {name}! Your epic adventure begins!")
+        self.history.reset()
+        self.pregenerate_quests()
         
         # Start animation loop
         self.animate_loop()
         
-    def make_player(self, name):
-        return {
-            "name": name,
-            "level": 1,
-            "xp": 0,
-            "next_xp": 100,
-            "gold": 20,
-            "inventory": {item: 0 for item in self.items},
-            "quests": []
-        }
-        
-    def make_quest(self, level):
-        qtype = random.choice(self.quest_types)
-        if qtype == "hunt":
-            target = random.choice(self.enemies)
-            need = random.randint(2, 4)
-            return {"title": f"Hunt {need} {target}(s)", "type": "hunt",
-                    "target": target, "need": need, "done": 0,
-                    "xp": 30 + level * 10, "gold": 15 + level * 5, "status": "new"}
+    def keep_unreadable_save(self):
+        # Set the old save aside before a new game starts; if that fails,
+        # play without saving rather than write over it
+        try:
+            backups = self.save.backup()
+        except OSError as e:
+            self.log_message(f"⚠️ Could not back up the old save, autosave is off: {e}",
+                             self.colors['red'])
+            self.save = None
         else:
-            target = random.choice(self.items)
-            need = random.randint(2, 5)
-            return {"title": f"Collect {need} {target}(s)", "type": "collect",
-                    "target": target, "need": need, "done": 0,
-                    "xp": 20 + level * 10, "gold": 10 + level * 5, "status": "new"}
-    
+            for path in backups:
+                self.log_message(f"💾 Old save kept as {path}")
+        
+    def mark_dirty(self, *regions):
+        # Coalesce every change in this event-loop turn into one repaint
+        self.dirty.update(regions)
+        if self.render_job is None:
+            self.render_job = self.root.after_idle(self.render_dirty)
+            
+    def mark_quests_dirty(self, quest_ids):
+        if quest_ids is None:
+            self.dirty_quests = None
+        elif self.dirty_quests is not None:
+            self.dirty_quests.update(dict.fromkeys(quest_ids))
+            
+    def render_dirty(self):
+        self.render_job = None
+        dirty, self.dirty = self.dirty, set()
+        dirty_quests, self.dirty_quests = self.dirty_quests, {}
+        if not self.player:
+            return
+            
+        if 'stats' in dirty:
+            self.update_stats()
+        if 'quests' in dirty:
+            self.update_quests(dirty_quests)
+        if 'inventory' in dirty:
+            self.update_inventory()
+        
     def update_display(self):
         if not self.player:
             return
             
-        # Update stats
-        self.name_label.configure(text=f"🏆 {self.player['name']}")
-        self.level_label.configure(text=f"Level {self.player['level']}")
+        self.dirty.clear()
+        self.dirty_quests = {}
+        self.update_stats()
+        self.update_quests()
+        self.update_inventory()
+        
+    def update_stats(self):
+        player = self.player
+        self.name_label.configure(text=f"🏆 {player.name}")
+        self.level_label.configure(text=f"Level {player.level}")
         
         # Update XP progress
-        xp_percent = (self.player['xp'] / self.player['next_xp']) * 100
+        xp_percent = (player.xp / player.next_xp) * 100
         self.xp_var.set(int(xp_percent))
-        self.xp_label.configure(text=f"XP: {self.player['xp']}/{self.player['next_xp']}")
+        self.xp_label.configure(text=f"XP: {player.xp}/{player.next_xp}")
         
-        self.gold_label.configure(text=f"💰 Gold: {self.player['gold']}")
+        self.gold_label.configure(text=f"💰 Gold: {player.gold}")
         
-        self.update_quests()
-        self.update_inventory()
+    def update_quests(self, quest_ids=None):
+        # Repaint the quests in quest_ids, or every quest when it is None
+        quests = self.player.quests
+        if quest_ids is None:
+            gone = [qid for qid in self.quest_widgets if qid not in quests]
+            quest_ids = quests
+        else:
+            gone = [qid for qid in quest_ids if qid not in quests and qid in self.quest_widgets]
         
-    def update_quests(self):
-        # Clear existing quest widgets
-        for widget in self.quest_frame.winfo_children():
-            widget.destroy()
+        # Drop widgets for quests that are no longer active
+        for quest_id in gone:
+            self.quest_widgets.pop(quest_id)['frame'].destroy()
             
-        if not self.player['quests']:
-            tk.Label(self.quest_frame, text="No active quests", 
-                    bg=self.colors['card'], fg=self.colors['text']).pack()
-        else:
-            for i, quest in enumerate(self.player['quests']):
-                quest_widget = self.create_quest_widget(self.quest_frame, quest, i)
-                quest_widget.pack(fill='x', pady=5)
+        if not quests:
+            if self.no_quests_label is None:
+                self.no_quests_label = tk.Label(self.quest_frame, text="No active quests", 
+                                                bg=self.colors['card'], fg=self.colors['text'])
+                self.no_quests_label.pack()
+            return
+            
+        if self.no_quests_label is not None:
+            self.no_quests_label.destroy()
+            self.no_quests_label = None
+            
+        # Changes arrive in order and new quests are always the newest, so
+        # packing at the end keeps order
+        for quest_id in quest_ids:
+            quest = quests.get(quest_id)
+            if quest is None:
+                continue
+            widget = self.quest_widgets.get(quest_id)
+            if widget is None:
+                widget = self.create_quest_widget(self.quest_frame, quest, len(self.quest_widgets))
+                widget['frame'].pack(fill='x', pady=5)
+                self.quest_widgets[quest_id] = widget
+            else:
+                self.refresh_quest_widget(widget, quest)
                 
-        # Update scroll region
-        self.quest_frame.update_idletasks()
-        self.quest_canvas.configure(scrollregion=self.quest_canvas.bbox("all"))
+    def quest_progress(self, quest):
+        if quest.status == ACTIVE:
+            progress = f"Progress: {quest.done}/{quest.need}"
+            color = self.colors['blue'] if quest.done < quest.need else self.colors['green']
+        else:
+            progress = "COMPLETED!"
+            color = self.colors['green']
+        return progress, color
         
     def create_quest_widget(self, parent, quest, index):
         frame = tk.Frame(parent, bg=self.colors['accent'], relief='raised', bd=2)
         
         # Quest title
-        tk.Label(frame, text=quest['title'], bg=self.colors['accent'], 
+        tk.Label(frame, text=self.engine.quest_title(quest), bg=self.colors['accent'], 
                 fg=self.colors['text'], font=('Arial', 10, 'bold')).pack(anchor='w', padx=5, pady=2)
         
         # Progress
-        if quest['status'] == 'active':
-            progress = f"Progress: {quest['done']}/{quest['need']}"
-            color = self.colors['blue'] if quest['done'] < quest['need'] else self.colors['green']
-        else:
-            progress = "COMPLETED!"
-            color = self.colors['green']
-            
-        tk.Label(frame, text=progress, bg=self.colors['accent'], 
-                fg=color, font=('Arial', 9)).pack(anchor='w', padx=5)
+        progress, color = self.quest_progress(quest)
+        progress_label = tk.Label(frame, text=progress, bg=self.colors['accent'], 
+                                 fg=color, font=('Arial', 9))
+        progress_label.pack(anchor='w', padx=5)
         
         # Rewards
-        rewards = f"Rewards: {quest['xp']} XP, {quest['gold']} Gold"
+        rewards = f"Rewards: {quest.xp} XP, {quest.gold} Gold"
         tk.Label(frame, text=rewards, bg=self.colors['accent'], 
                 fg=self.colors['gold'], font=('Arial', 8)).pack(anchor='w', padx=5, pady=(0, 5))
         
-        return frame
+        return {'frame': frame, 'progress': progress_label, 'shown': (progress, color)}
+        
+    def refresh_quest_widget(self, widget, quest):
+        # Title and rewards never change, only the progress line does
+        shown = self.quest_progress(quest)
+        if shown != widget['shown']:
+            progress, color = shown
+            widget['progress'].configure(text=progress, fg=color)
+            widget['shown'] = shown
         
     def update_inventory(self):
-        # Clear existing inventory widgets
-        for widget in self.inventory_frame.winfo_children():
-            widget.destroy()
+        emoji = self.engine.catalog.item_emoji
+        owned = self.player.inventory.owned()
+        
+        # Drop widgets for items that ran out
+        owned_ids = {item for item, _ in owned}
+        for item in [item for item in self.inventory_widgets if item not in owned_ids]:
+            self.inventory_widgets.pop(item)['frame'].destroy()
+            
+        # Create inventory grid, two items per row
+        for index, (item, count) in enumerate(owned):
+            cell = divmod(index, 2)
+            text = f"{emoji[item]} {count}"
+            widget = self.inventory_widgets.get(item)
             
-        # Create inventory grid
-        row = 0
-        col = 0
-        for item, count in self.player['inventory'].items():
-            if count > 0:
+            if widget is None:
                 item_frame = tk.Frame(self.inventory_frame, bg=self.colors['accent'], 
                                      relief='raised', bd=1, padx=5, pady=3)
-                item_frame.grid(row=row, column=col, padx=2, pady=2, sticky='ew')
+                label = tk.Label(item_frame, text=text, 
+                                bg=self.colors['accent'], fg=self.colors['text'],
+                                font=('Arial', 10))
+                label.pack()
+                widget = {'frame': item_frame, 'label': label, 'text': text, 'cell': None}
+                self.inventory_widgets[item] = widget
+            elif widget['text'] != text:
+                widget['label'].configure(text=text)
+                widget['text'] = text
                 
-                emoji_map = {"potion": "🧪", "sword": "⚔️", "shield": "🛡️", "gold": "💰"}
-                emoji = emoji_map.get(item, "📦")
-                
-                tk.Label(item_frame, text=f"{emoji} {count}", 
-                        bg=self.colors['accent'], fg=self.colors['text'],
-                        font=('Arial', 10)).pack()
-                
-                col += 1
-                if col > 1:
-                    col = 0
-                    row += 1
+            if widget['cell'] != cell:
+                row, col = cell
+                widget['frame'].grid(row=row, column=col, padx=2, pady=2, sticky='ew')
+                widget['cell'] = cell
     
     def log_message(self, message, color=None):
         if color is None:
             color = self.colors['text']
             
-        self.log_text.configure(state='normal')
-        self.log_text.insert(tk.END, f"{message}\n", )
-        self.log_text.see(tk.END)
-        self.log_text.configure(state='disabled')
+        self.log_view.append(message)
         
         # Add floating text animation
         self.add_floating_text(message)
         
     def add_floating_text(self, text):
-        # Create floating text animation
-        x = random.randint(200, 800)
+        # Float upward 2px per frame for 30 frames
+        x = self.fx_rng.randint(200, 800)
         y = 400
-        
-        text_id = self.animation_canvas.create_text(x, y, text=text, 
-                                                   fill=self.colors['gold'], 
-                                                   font=('Arial', 12, 'bold'))
-        
-        # Animate upward movement
-        def animate_text(current_y, steps):
-            if steps > 0:
-                new_y = current_y - 2
-                self.animation_canvas.coords(text_id, x, new_y)
-                self.root.after(50, lambda: animate_text(new_y, steps - 1))
-            else:
-                self.animation_canvas.delete(text_id)
-                
-        animate_text(y, 30)
-    
-    def add_xp(self, amount):
-        old_level = self.player["level"]
-        self.player["xp"] += amount
-        
-        self.log_message(f"⭐ Gained {amount} XP!", self.colors['blue'])
-        
-        if self.player["xp"] >= self.player["next_xp"]:
-            self.player["level"] += 1
-            self.player["xp"] = 0
-            self.player["next_xp"] = int(self.player["next_xp"] * 1.5)
-            self.log_message(f"🎉 LEVEL UP! You are now level {self.player['level']}!", 
-                           self.colors['gold'])
-            self.show_level_up_animation()
-            
-        self.update_display()
+        self.animator.add_text(x, y, text, self.colors['gold'], ('Arial', 12, 'bold'),
+                               frames=30, dy=-2)
     
     def show_level_up_animation(self):
-        # Create level up effect
+        # Create level up effect, stars fade out one frame apart
         for i in range(20):
-            x = random.randint(100, 900)
-            y = random.randint(100, 600)
-            star = self.animation_canvas.create_text(x, y, text="⭐", 
-                                                    fill=self.colors['gold'], 
-                                                    font=('Arial', 16))
-            
-            # Animate stars
-            def animate_star(star_id, delay):
-                self.root.after(delay, lambda: self.animation_canvas.delete(star_id))
-                
-            animate_star(star, 2000 + i * 100)
+            x = self.fx_rng.randint(100, 900)
+            y = self.fx_rng.randint(100, 600)
+            self.animator.add_text(x, y, "⭐", self.colors['gold'], ('Arial', 16),
+                                   frames=40 + i * 2, droppable=False)
     
-    def fight_action(self):
-        self.disable_buttons()
-        enemy = random.choice(self.enemies)
-        xp_gain = 20
-        gold_gain = 10
+    def schedule_action(self, delay, callback):
+        self.pending_action = callback
+        self.pending_job = self.clock.after(delay, self.finish_action)
         
-        emoji_map = {"goblin": "👹", "orc": "👺", "skeleton": "💀", "dragon": "🐉"}
-        emoji = emoji_map.get(enemy, "👾")
+    def finish_action(self):
+        callback, self.pending_action = self.pending_action, None
+        self.pending_job = None
+        if callback is not None:
+            callback()
         
-        self.log_message(f"⚔️ Fighting {emoji} {enemy}...")
+    def fight_action(self):
+        self.disable_buttons()
+        count = self.repeat_var.get()
+        if self.remote is not None:
+            self.remote_action(1500, "fight", count=count)
+            return
+        if count > 1:
+            # The whole run shares one battle delay and resolves as one batch
+            enemies = self.engine.start_fights(count)
+            self.schedule_action(1500, lambda: self.complete_fights(enemies))
+            return
+            
+        enemy, xp_gain, gold_gain = self.engine.start_fight()
         
         # Simulate battle delay
-        self.root.after(1500, lambda: self.complete_fight(enemy, xp_gain, gold_gain))
+        self.schedule_action(1500, lambda: self.complete_fight(enemy, xp_gain, gold_gain))
         
     def complete_fight(self, enemy, xp_gain, gold_gain):
-        self.log_message(f"🎯 Defeated {enemy}! +{xp_gain} XP, +{gold_gain} Gold")
-        self.add_xp(xp_gain)
-        self.player["gold"] += gold_gain
-        
-        # Update hunt quests
-        for q in self.player["quests"]:
-            if q["type"] == "hunt" and q["target"] == enemy and q["status"] == "active":
-                q["done"] += 1
-                if q["done"] >= q["need"]:
-                    q["status"] = "done"
-                    self.log_message(f"✅ Quest Completed: {q['title']}")
-                    self.complete_quest(q)
-                    
-        self.update_display()
+        self.engine.complete_fight(enemy, xp_gain, gold_gain)
+        self.enable_buttons()
+        
+    def complete_fights(self, enemies):
+        self.engine.complete_fights(enemies)
         self.enable_buttons()
         
     def explore_action(self):
         self.disable_buttons()
-        item = random.choice(self.items)
+        count = self.repeat_var.get()
+        if self.remote is not None:
+            self.remote_action(1000, "explore", count=count)
+            return
+        if count > 1:
+            items = self.engine.start_explores(count)
+            self.schedule_action(1000, lambda: self.complete_explores(items))
+            return
+            
+        item = self.engine.start_explore()
         
-        emoji_map = {"potion": "🧪", "sword": "⚔️", "shield": "🛡️", "gold": "💰"}
-        emoji = emoji_map.get(item, "📦")
+        # Simulate exploration delay
+        self.schedule_action(1000, lambda: self.complete_explore(item))
         
-        self.log_message(f"🔍 Exploring...")
+    def complete_explore(self, item):
+        self.engine.complete_explore(item)
+        self.enable_buttons()
         
-        # Simulate exploration delay
-        self.root.after(1000, lambda: self.complete_explore(item, emoji))
-        
-    def complete_explore(self, item, emoji):
-        self.log_message(f"🎁 Found {emoji} {item}!")
-        self.player["inventory"][item] += 1
-        
-        # Update collect quests
-        for q in self.player["quests"]:
-            if q["type"] == "collect" and q["target"] == item and q["status"] == "active":
-                q["done"] += 1
-                if q["done"] >= q["need"]:
-                    q["status"] = "done"
-                    self.log_message(f"✅ Quest Completed: {q['title']}")
-                    self.complete_quest(q)
-                    
-        self.update_display()
+    def complete_explores(self, items):
+        self.engine.complete_explores(items)
         self.enable_buttons()
         
-    def complete_quest(self, quest):
-        self.add_xp(quest["xp"])
-        self.player["gold"] += quest["gold"]
-        self.player["quests"].remove(quest)
+    def remote_action(self, delay, op, **args):
+        # The server resolves the action at once; its result is shown after
+        # the usual delay
+        count = args.get("count", 1)
+        self.remote.request(op, callback=lambda reply: self.schedule_action(
+            delay, lambda: self.finish_remote_action(reply, op, count)),
+            error=self.remote_failed, **args)
+        
+    def finish_remote_action(self, reply, op, count):
+        self.remote.apply(reply)
+        self.history.record(op if count == 1 else f"{op}_batch", count)
+        self.enable_buttons()
+        
+    def remote_failed(self, error):
+        self.log_message(f"⚠️ Server error: {error}", self.colors['red'])
+        self.enable_buttons()
         
     def show_quests_action(self):
         # Check for completed quests
-        completed = [q for q in self.player["quests"] if q["status"] == "done"]
-        for quest in completed:
-            self.complete_quest(quest)
+        if self.remote is not None:
+            self.remote.request("collect_quests", callback=self.quests_collected,
+                                error=self.remote_failed)
+        else:
+            self.engine.collect_done_quests()
+            self.quests_collected()
             
-        if not self.player["quests"]:
+    def quests_collected(self, reply=None):
+        if reply is not None:
+            self.remote.apply(reply)
+            self.history.record("complete_quest")
+        if not self.player.quests:
             self.log_message("📋 No active quests.")
         else:
             self.log_message("📋 Check your quest panel for active quests!")
-            
-        self.update_display()
         
     def new_quest_action(self):
         # Create quest selection dialog
@@ -512,10 +670,10 @@ class AnimatedRPG:
                            relief='raised', bd=2)
             frame.pack(fill='x', padx=10, pady=5)
             
-            tk.Label(frame, text=quest['title'], bg=self.colors['card'], 
+            tk.Label(frame, text=self.engine.quest_title(quest), bg=self.colors['card'], 
                     fg=self.colors['text'], font=('Arial', 11, 'bold')).pack(anchor='w', padx=5, pady=2)
             
-            rewards = f"Rewards: {quest['xp']} XP, {quest['gold']} Gold"
+            rewards = f"Rewards: {quest.xp} XP, {quest.gold} Gold"
             tk.Label(frame, text=rewards, bg=self.colors['card'], 
                     fg=self.colors['gold'], font=('Arial', 9)).pack(anchor='w', padx=5)
             
@@ -523,21 +681,83 @@ class AnimatedRPG:
                      command=lambda q=quest, w=quest_window: self.accept_quest(q, w),
                      bg=self.colors['green'], fg='white', font=('Arial', 10, 'bold')).pack(pady=5)
     
-    def accept_quest(self, quest, window):
-        quest["status"] = "active"
-        self.player["quests"].append(quest)
-        
-        # Replace with new quest
-        index = self.available_quests.index(quest)
-        self.available_quests[index] = self.make_quest(self.player["level"])
+    def pregenerate_quests(self):
+        # Roll the next few replacement quests off the Tk thread
+        if self.remote is None:
+            self.workers.submit(self.engine.pregenerate_quests, 2 * len(self.available_quests),
+                                error=self.pregenerate_failed)
+            
+    def pregenerate_failed(self, error):
+        # Quests still roll on demand, so the game carries on
+        self.log_message(f"⚠️ Quest pre-generation failed: {error}", self.colors['red'])
         
-        self.log_message(f"📝 Accepted quest: {quest['title']}")
-        self.update_display()
+    def accept_quest(self, quest, window):
+        if self.remote is not None:
+            self.remote.request("accept_quest", slot=self.available_quests.index(quest),
+                                callback=self.remote_accepted, error=self.remote_failed)
+        else:
+            self.engine.accept_quest(quest)
+            self.pregenerate_quests()
         window.destroy()
         
+    def remote_accepted(self, reply):
+        self.remote.apply(reply)
+        self.history.record("accept_quest")
+        
     def show_inventory_action(self):
         self.log_message("🎒 Check your inventory panel!")
         
+    def open_analytics(self):
+        # pandas and plotly are imported by the worker the first time, so
+        # neither the game's start nor the Tk thread waits on them
+        if self.analytics_pending or self.player is None:
+            return
+        self.analytics_pending = True
+        self.log_message("📊 Building session analytics...")
+        rows, quest_events = self.history.snapshot()
+        self.workers.submit(build_report, rows, quest_events, self.engine.catalog,
+                            self.player.name, callback=self.show_analytics,
+                            error=self.analytics_failed)
+        
+    def show_analytics(self, report):
+        self.analytics_pending = False
+        path, summary = report
+        
+        window = tk.Toplevel(self.root)
+        window.title("Session Analytics")
+        window.configure(bg=self.colors['bg'])
+        window.transient(self.root)
+        
+        tk.Label(window, text="📊 Session Analytics", bg=self.colors['bg'],
+                fg=self.colors['gold'], font=('Arial', 16, 'bold')).pack(pady=10)
+        lines = [f"{summary['actions']} actions in {summary['minutes']:.1f} min",
+                 f"+{summary['levels']} levels, {summary['gold']:+} Gold"]
+        for kind, accepted, completed, rate in summary['quests']:
+            rate = f"{rate:.0%}" if rate == rate else "-"
+            lines.append(f"{kind.title()} quests: {completed}/{accepted} completed ({rate})")
+        for line in lines:
+            tk.Label(window, text=line, bg=self.colors['bg'], fg=self.colors['text'],
+                    font=('Arial', 11)).pack(anchor='w', padx=15)
+        
+        tk.Button(window, text="Open Charts", command=lambda: self.open_charts(path),
+                 bg=self.colors['blue'], fg='white', font=('Arial', 10, 'bold')).pack(pady=10)
+        self.log_message(f"📊 Analytics saved to {path}")
+        
+    def open_charts(self, path):
+        # Only needed once a report exists, so kept off the startup path
+        import webbrowser
+        from pathlib import Path
+        
+        webbrowser.open(Path(path).as_uri())
+        
+    def analytics_failed(self, error):
+        self.analytics_pending = False
+        if isinstance(error, ImportError):
+            self.log_message("📊 Analytics needs pandas and plotly (pip install pandas plotly)",
+                             self.colors['red'])
+        else:
+            self.log_message(f"⚠️ Could not build analytics: {error}", self.colors['red'])
+        
     def disable_buttons(self):
         for btn in self.action_buttons:
             btn.configure(state='disabled')
@@ -548,22 +768,39 @@ class AnimatedRPG:
             
     def animate_loop(self):
         # Continuous background animations
-        if random.random() < 0.1:  # 10% chance each cycle
+        if self.fx_rng.random() < 0.1:  # 10% chance each cycle
             self.add_sparkle_effect()
             
-        self.root.after(2000, self.animate_loop)
+        self.clock.after(2000, self.animate_loop)
         
     def add_sparkle_effect(self):
-        # Add random sparkles
-        x = random.randint(50, 950)
-        y = random.randint(50, 650)
-        sparkle = self.animation_canvas.create_text(x, y, text="✨", 
-                                                  fill=self.colors['gold'], 
-                                                  font=('Arial', 12))
-        
-        # Remove after 3 seconds
-        self.root.after(3000, lambda: self.animation_canvas.delete(sparkle))
+        # Add random sparkles, removed after 3 seconds
+        x = self.fx_rng.randint(50, 950)
+        y = self.fx_rng.randint(50, 650)
+        self.animator.add_text(x, y, "✨", self.colors['gold'], ('Arial', 12), frames=60)
     
+    def toggle_turbo(self):
+        if self.clock.scale == TURBO:
+            self.clock.set_scale(NORMAL)
+            self.log_message("▶️ Normal speed")
+        else:
+            self.clock.set_scale(TURBO)
+            self.log_message("⏩ Turbo mode!")
+        
+    def on_close(self):
+        # Resolve an action in flight so the save ends on an action boundary
+        if self.pending_job is not None:
+            self.clock.cancel(self.pending_job)
+            self.finish_action()
+        if self.save is not None:
+            self.save.close()
+        self.io.shutdown()
+        self.workers.shutdown()
+        if self.remote is not None:
+            self.remote.close()
+        self.activity_log.close()
+        self.root.destroy()
+        
     def run(self):
         self.root.mainloop()
 
@@ -571,5 +808,30 @@ class AnimatedRPG:
 import tkinter.simpledialog
 
 if __name__ == "__main__":
-    game = AnimatedRPG()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Epic Quest Adventure")
+    parser.add_argument("--name", default=None, help="start a new game with this hero")
+    parser.add_argument("--seed", type=int, default=None, help="seed for the game's dice")
+    parser.add_argument("--profile", action="store_true",
+                        help="time callbacks and show the profiler overlay (F12)")
+    parser.add_argument("--speed", type=float, default=NORMAL,
+                        help=f"game clock scale, {TURBO:g} for turbo (F6 toggles)")
+    parser.add_argument("--content", default=CONTENT_PATH,
+                        help="content catalog with enemies, items, quests and colours")
+    parser.add_argument("--server", default=None, metavar="HOST:PORT",
+                        help="play a hero hosted by rpg_server.py instead of a local game")
+    args = parser.parse_args()
+    if args.seed is not None and not 0 <= args.seed < SEED_LIMIT:
+        parser.error(f"--seed must be from 0 to {SEED_LIMIT - 1}")
+    if args.server:
+        from rpg_client import parse_address
+        
+        try:
+            parse_address(args.server)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    game = AnimatedRPG(player_name=args.name, seed=args.seed, profile=args.profile,
+                       speed=args.speed, catalog=load_catalog(args.content), server=args.server)
     game.run()
\ No newline at end of file
@@ -0,0 +1,170 @@
+import os
+import tkinter as tk
+
+LOG_DIR = os.path.join(os.path.expanduser("~"), ".epic_quest", "logs")
+
+
+class ActivityLog:
+    # Append-only activity log on disk. Lines are numbered from the first
+    # line ever written and stored in segment files of lines_per_file lines,
+    # so any line number maps straight to a file. The oldest segments are
+    # deleted once there are more than max_files.
+    def __init__(self, directory=LOG_DIR, lines_per_file=10000, max_files=50):
+        self.directory = directory
+        self.lines_per_file = lines_per_file
+        self.max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+
+        self.segments = sorted(
+            int(name.split(".")[1]) for name in os.listdir(directory)
+            if name.startswith("activity.") and name.endswith(".log"))
+        if self.segments:
+            last = self.segments[-1]
+            with open(self.segment_path(last), encoding="utf-8") as f:
+                self.total = last * lines_per_file + sum(1 for _ in f)
+        else:
+            self.total = 0
+
+        self.file = None
+        self.current = None
+        self.cached = (None, [])
+
+    @property
+    def first_line(self):
+        return self.segments[0] * self.lines_per_file if self.segments else self.total
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"activity.{segment:06d}.log")
+
+    def rotate(self, segment):
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.segment_path(segment), "a", encoding="utf-8")
+        self.current = segment
+        if segment not in self.segments:
+            self.segments.append(segment)
+
+        while len(self.segments) > self.max_files:
+            os.remove(self.segment_path(self.segments.pop(0)))
+
+    def append(self, message):
+        segment = self.total // self.lines_per_file
+        if segment != self.current:
+            self.rotate(segment)
+        self.file.write(message.replace("\n", " ") + "\n")
+        self.total += 1
+
+    def segment_lines(self, segment):
+        if segment == self.current:
+            self.file.flush()
+        elif self.cached[0] == segment:
+            return self.cached[1]
+
+        with open(self.segment_path(segment), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        if segment != self.current:
+            self.cached = (segment, lines)
+        return lines
+
+    def read(self, start, stop):
+        # Lines [start, stop), clipped to what is still on disk
+        start = max(start, self.first_line)
+        stop = min(stop, self.total)
+        lines = []
+        while start < stop:
+            segment, offset = divmod(start, self.lines_per_file)
+            chunk = self.segment_lines(segment)[offset:offset + stop - start]
+            if not chunk:
+                break
+            lines.extend(chunk)
+            start += len(chunk)
+        return lines
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.current = None
+
+
+class LogView:
+    # Shows a window of at most max_lines lines of an ActivityLog in a Text
+    # widget. Scrolling to either edge pages more lines in from disk.
+    def __init__(self, root, text, scrollbar, store, max_lines=1000, page_lines=250):
+        self.root = root
+        self.text = text
+        self.scrollbar = scrollbar
+        self.store = store
+        self.max_lines = max_lines
+        self.page_lines = page_lines
+
+        # Line numbers [first, last) of the store currently in the widget
+        self.first = self.last = store.total
+        self.loading = None
+        text.configure(yscrollcommand=self.on_scroll)
+
+    def append(self, message):
+        live = self.last == self.store.total
+        self.store.append(message)
+        if not live:
+            return
+
+        following = self.text.yview()[1] >= 1.0
+        self.text.configure(state='normal')
+        self.text.insert(tk.END, f"{message}\n")
+        self.last += 1
+        # While the user reads back, allow one extra window before trimming
+        self.trim_top(self.max_lines if following else 2 * self.max_lines)
+        self.text.configure(state='disabled')
+        if following:
+            self.text.see(tk.END)
+
+    def trim_top(self, limit):
+        excess = (self.last - self.first) - limit
+        if excess > 0:
+            self.text.delete("1.0", f"{excess + 1}.0")
+            self.first += excess
+
+    def trim_bottom(self, limit):
+        excess = (self.last - self.first) - limit
+        if excess > 0:
+            self.text.delete(f"{limit + 1}.0", tk.END)
+            self.last -= excess
+
+    def on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self.loading is not None:
+            return
+        if float(first) <= 0.0 and self.first > self.store.first_line:
+            self.loading = self.root.after_idle(self.load_older)
+        elif float(last) >= 1.0 and self.last < self.store.total:
+            self.loading = self.root.after_idle(self.load_newer)
+
+    def load_older(self):
+        self.loading = None
+        lines = self.store.read(self.first - self.page_lines, self.first)
+        if not lines:
+            return
+
+        self.text.configure(state='normal')
+        self.text.insert("1.0", "\n".join(lines) + "\n")
+        self.first -= len(lines)
+        self.trim_bottom(self.max_lines)
+        self.text.configure(state='disabled')
+        # Keep the line the user was looking at in place
+        self.text.yview(f"{len(lines) + 1}.0")
+
+    def load_newer(self):
+        self.loading = None
+        lines = self.store.read(self.last, self.last + self.page_lines)
+        if not lines:
+            return
+
+        shown = self.last - self.first
+        self.text.configure(state='normal')
+        self.text.insert(tk.END, "\n".join(lines) + "\n")
+        self.last += len(lines)
+        before = self.first
+        self.trim_top(self.max_lines)
+        self.text.configure(state='disabled')
+        self.text.see(f"{shown - (self.first - before)}.0")
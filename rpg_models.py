@@ -0,0 +1,84 @@
+from array import array
+
+# Quest kinds and statuses are small ints; enemies and items are their index
+# in GameEngine.enemies / GameEngine.items
+HUNT, COLLECT = range(2)
+NEW, ACTIVE, DONE = range(3)
+
+
+class Inventory:
+    # Item counts in a flat array indexed by item id
+    __slots__ = ("counts",)
+
+    def __init__(self, size=0):
+        self.counts = array("I", bytes(4 * size))
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __getitem__(self, item):
+        return self.counts[item]
+
+    def __setitem__(self, item, count):
+        self.counts[item] = count
+
+    def __eq__(self, other):
+        return isinstance(other, Inventory) and self.counts == other.counts
+
+    def grow(self, size):
+        # Make room for items added to the game after this inventory was made
+        if size > len(self.counts):
+            self.counts.frombytes(bytes(4 * (size - len(self.counts))))
+
+    def owned(self):
+        # (item id, count) for every item held at least once
+        return [(item, count) for item, count in enumerate(self.counts) if count]
+
+
+class Quest:
+    __slots__ = ("id", "kind", "target", "need", "done", "level", "xp", "gold", "status")
+
+    def __init__(self, quest_id, kind, target, need, level, xp, gold, done=0, status=NEW):
+        self.id = quest_id
+        self.kind = kind
+        self.target = target
+        self.need = need
+        self.done = done
+        self.level = level
+        self.xp = xp
+        self.gold = gold
+        self.status = status
+
+    def fields(self):
+        return tuple(getattr(self, name) for name in Quest.__slots__)
+
+    @classmethod
+    def from_fields(cls, fields):
+        quest = cls.__new__(cls)
+        for name, value in zip(cls.__slots__, fields):
+            setattr(quest, name, value)
+        return quest
+
+    def __eq__(self, other):
+        return isinstance(other, Quest) and self.fields() == other.fields()
+
+    def __repr__(self):
+        return "Quest(" + ", ".join(f"{name}={getattr(self, name)!r}" for name in Quest.__slots__) + ")"
+
+
+class Player:
+    __slots__ = ("name", "level", "xp", "next_xp", "gold", "inventory", "quests")
+
+    def __init__(self, name, inventory, level=1, xp=0, next_xp=100, gold=20):
+        self.name = name
+        self.level = level
+        self.xp = xp
+        self.next_xp = next_xp
+        self.gold = gold
+        self.inventory = inventory
+        # Accepted quests by id, in the order they were taken
+        self.quests = {}
+
+    def __eq__(self, other):
+        return isinstance(other, Player) and all(
+            getattr(self, name) == getattr(other, name) for name in Player.__slots__)
@@ -0,0 +1,305 @@
+import time
+
+import numpy as np
+
+from rpg_catalog import CONTENT_PATH, load_catalog
+from rpg_models import HUNT
+
+# Vectorized Monte Carlo version of the rules in rpg_engine.GameEngine. Every
+# hero is one row in a set of arrays, and each step advances all of them at
+# once. Quest targets are encoded as one key: enemy ids first for hunts, then
+# n_enemies + item id for collects, with ids from the content catalog.
+
+AVAILABLE_QUESTS = 3
+# Quest need and progress are int16 columns
+MAX_NEED = int(np.iinfo(np.int16).max)
+
+FIGHT, EXPLORE, ACCEPT_QUEST = 0, 1, 2
+
+
+class HeroBatch:
+    def __init__(self, n, rng, catalog, quest_capacity=8, available_quests=AVAILABLE_QUESTS):
+        self.n = n
+        self.rng = rng
+        self.rows = np.arange(n)
+        self.available = available_quests
+
+        # Content tables, indexed by enemy id or quest kind
+        self.n_enemies = len(catalog.enemies)
+        self.n_items = len(catalog.items)
+        self.key_dtype = np.int8 if self.n_enemies + self.n_items <= 127 else np.int32
+        self.fight_xp = np.array(catalog.enemy_xp, dtype=np.int64)
+        self.fight_gold = np.array(catalog.enemy_gold, dtype=np.int64)
+        qts = catalog.quest_types
+        self.n_targets = np.array([len(targets) for targets in catalog.quest_targets])
+        self.need_min = np.array([qt.need_min for qt in qts])
+        self.need_max = np.array([qt.need_max for qt in qts])
+        if self.need_max.max() > MAX_NEED:
+            raise ValueError(f"Monte Carlo quest need is limited to {MAX_NEED}")
+        self.quest_xp = np.array([(qt.xp_base, qt.xp_per_level) for qt in qts], dtype=np.int64)
+        self.quest_gold = np.array([(qt.gold_base, qt.gold_per_level) for qt in qts], dtype=np.int64)
+        # Level curve, cut off before the cumulative totals leave int64
+        levels = catalog.levels
+        n_levels = 1
+        while levels.start(n_levels + 1) < 2 ** 62 and n_levels < 10000:
+            n_levels += 1
+        self.level_start = np.array(levels.totals[:n_levels], dtype=np.int64)
+        self.level_step = np.array(levels.steps[:n_levels], dtype=np.int64)
+
+        self.level = np.ones(n, dtype=np.int64)
+        self.xp = np.zeros(n, dtype=np.int64)
+        self.next_xp = np.full(n, self.level_step[0], dtype=np.int64)
+        self.gold = np.full(n, 20, dtype=np.int64)
+        self.inventory = np.zeros((n, self.n_items), dtype=np.int64)
+
+        # Offered quests, refilled with make_quest() when one is accepted
+        self.avail_key = np.zeros((n, available_quests), dtype=self.key_dtype)
+        self.avail_need = np.zeros((n, available_quests), dtype=np.int16)
+        self.avail_xp = np.zeros((n, available_quests), dtype=np.int64)
+        self.avail_gold = np.zeros((n, available_quests), dtype=np.int64)
+        for j in range(available_quests):
+            self.fill_available(self.rows, np.full(n, j))
+
+        # Active quests in fixed slots, empty slots have key -1
+        self.q_key = np.full((n, quest_capacity), -1, dtype=self.key_dtype)
+        self.q_need = np.zeros((n, quest_capacity), dtype=np.int16)
+        self.q_done = np.zeros((n, quest_capacity), dtype=np.int16)
+        self.q_xp = np.zeros((n, quest_capacity), dtype=np.int64)
+        self.q_gold = np.zeros((n, quest_capacity), dtype=np.int64)
+        self.q_count = np.zeros(n, dtype=np.int64)
+        # Slots at or past high are empty for every hero
+        self.high = 0
+
+    def fill_available(self, rows, slots):
+        # Same distributions as GameEngine.make_quest
+        k = len(rows)
+        level = self.level[rows]
+        kind = self.rng.integers(0, len(self.n_targets), k)
+        target = self.rng.integers(0, self.n_targets[kind])
+        need = self.rng.integers(self.need_min[kind], self.need_max[kind] + 1)
+
+        self.avail_key[rows, slots] = np.where(kind == HUNT, target, self.n_enemies + target)
+        self.avail_need[rows, slots] = need
+        self.avail_xp[rows, slots] = self.quest_xp[kind, 0] + level * self.quest_xp[kind, 1]
+        self.avail_gold[rows, slots] = self.quest_gold[kind, 0] + level * self.quest_gold[kind, 1]
+
+    def add_xp(self, rows, amount):
+        # Same as GameEngine.add_xp: any number of level-ups per grant with
+        # the overflow kept. rows must not repeat.
+        xp = self.xp[rows] + amount
+        up = xp >= self.next_xp[rows]
+        if up.any():
+            up_rows = rows[up]
+            total = self.level_start[self.level[up_rows] - 1] + xp[up]
+            level = np.minimum(np.searchsorted(self.level_start, total, side="right"),
+                               len(self.level_start))
+            self.level[up_rows] = level
+            xp[up] = total - self.level_start[level - 1]
+            self.next_xp[up_rows] = self.level_step[level - 1]
+        self.xp[rows] = xp
+
+    def grow_quests(self):
+        cap = self.q_key.shape[1]
+        pad = ((0, 0), (0, cap))
+        self.q_key = np.pad(self.q_key, pad, constant_values=-1)
+        self.q_need = np.pad(self.q_need, pad)
+        self.q_done = np.pad(self.q_done, pad)
+        self.q_xp = np.pad(self.q_xp, pad)
+        self.q_gold = np.pad(self.q_gold, pad)
+
+    def accept(self, mask):
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return
+        while self.q_count[rows].max() >= self.q_key.shape[1]:
+            self.grow_quests()
+
+        pick = self.rng.integers(0, self.available, len(rows))
+        slot = np.argmax(self.q_key[rows] < 0, axis=1)
+        self.q_key[rows, slot] = self.avail_key[rows, pick]
+        self.q_need[rows, slot] = self.avail_need[rows, pick]
+        self.q_done[rows, slot] = 0
+        self.q_xp[rows, slot] = self.avail_xp[rows, pick]
+        self.q_gold[rows, slot] = self.avail_gold[rows, pick]
+        self.q_count[rows] += 1
+        self.high = max(self.high, slot.max() + 1)
+
+        self.fill_available(rows, pick)
+
+    def progress(self, key):
+        # Advance every active quest matching this step's fight/explore key
+        rows, cols = np.nonzero(self.q_key[:, :self.high] == key[:, None])
+        if not len(rows):
+            return
+        done = self.q_done[rows, cols] + 1
+        self.q_done[rows, cols] = done
+        completed = done >= self.q_need[rows, cols]
+        if not completed.any():
+            return
+        rows = rows[completed]
+        cols = cols[completed]
+
+        # XP now carries over between levels, so a hero's completions can be
+        # summed and granted at once
+        heroes, first = np.unique(rows, return_index=True)
+        xp = np.add.reduceat(self.q_xp[rows, cols], first)
+        gold = np.add.reduceat(self.q_gold[rows, cols], first)
+        self.add_xp(heroes, xp)
+        self.gold[heroes] += gold
+
+        self.q_key[rows, cols] = -1
+        np.subtract.at(self.q_count, rows, 1)
+
+    def step(self, strategy):
+        u = self.rng.random(self.n)
+        fight = u < strategy[:, FIGHT]
+        explore = ~fight & (u < strategy[:, FIGHT] + strategy[:, EXPLORE])
+        accept = ~(fight | explore)
+
+        enemy = self.rng.integers(0, self.n_enemies, self.n)
+        item = self.rng.integers(0, self.n_items, self.n)
+
+        # complete_fight: XP first, then gold, then hunt quests
+        fighters = self.rows[fight]
+        self.add_xp(fighters, self.fight_xp[enemy[fight]])
+        self.gold[fighters] += self.fight_gold[enemy[fight]]
+
+        # complete_explore: inventory, then collect quests
+        self.inventory[self.rows[explore], item[explore]] += 1
+
+        key = np.where(fight, enemy, np.where(explore, self.n_enemies + item, -2)).astype(self.key_dtype)
+        self.progress(key)
+
+        self.accept(accept)
+
+
+def normalize_strategy(strategy, n):
+    strategy = np.asarray(strategy, dtype=np.float64)
+    if strategy.ndim == 1:
+        strategy = np.broadcast_to(strategy, (n, 3))
+    if strategy.shape != (n, 3):
+        raise ValueError(f"strategy must have shape (3,) or ({n}, 3), got {strategy.shape}")
+    return strategy / strategy.sum(axis=1, keepdims=True)
+
+
+def run_batch(n, n_actions, strategy, rng, max_level, sample_steps, catalog,
+              available_quests=AVAILABLE_QUESTS):
+    batch = HeroBatch(n, rng, catalog, available_quests=available_quests)
+    strategy = normalize_strategy(strategy, n)
+
+    # Action count at which each hero first reached each level, -1 if never
+    time_to_level = np.full((n, max_level + 1), -1, dtype=np.int32)
+    time_to_level[:, 1] = 0
+    gold = np.empty((len(sample_steps), n), dtype=np.int64)
+    sample = 0
+
+    for t in range(1, n_actions + 1):
+        before = batch.level.copy()
+        batch.step(strategy)
+
+        reached = before
+        while True:
+            m = reached < batch.level
+            if not m.any():
+                break
+            reached = reached + m
+            m &= reached <= max_level
+            time_to_level[m, reached[m]] = t
+
+        while sample < len(sample_steps) and sample_steps[sample] == t:
+            gold[sample] = batch.gold
+            sample += 1
+
+    return batch, time_to_level, gold
+
+
+def simulate_population(n_heroes, n_actions, strategy=(1, 1, 1), seed=None,
+                        max_level=20, n_samples=50, batch_size=100000, catalog=None,
+                        available_quests=AVAILABLE_QUESTS):
+    # strategy is the fight/explore/accept_quest mix, either one row for
+    # every hero or one row per hero. Heroes run in batches to bound memory.
+    start = time.perf_counter()
+    catalog = catalog if catalog is not None else load_catalog()
+    sample_steps = np.unique(np.linspace(1, n_actions, min(n_samples, n_actions)).astype(np.int64))
+
+    strategy = np.asarray(strategy, dtype=np.float64)
+    per_hero = strategy.ndim == 2
+
+    n_batches = -(-n_heroes // batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+
+    time_to_level = []
+    gold = []
+    final_level = []
+    final_gold = []
+    for i, child in enumerate(seeds):
+        lo = i * batch_size
+        hi = min(lo + batch_size, n_heroes)
+        mix = strategy[lo:hi] if per_hero else strategy
+        batch, ttl, g = run_batch(hi - lo, n_actions, mix, np.random.default_rng(child),
+                                  max_level, sample_steps, catalog, available_quests)
+        time_to_level.append(ttl)
+        gold.append(g)
+        final_level.append(batch.level)
+        final_gold.append(batch.gold)
+
+    gold = np.concatenate(gold, axis=1)
+    p10, p50, p90 = np.percentile(gold, [10, 50, 90], axis=1)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "heroes": n_heroes,
+        "actions": n_actions,
+        "seed": seed,
+        "time_to_level": np.concatenate(time_to_level),
+        "gold_curve": {
+            "steps": sample_steps,
+            "mean": gold.mean(axis=1),
+            "p10": p10,
+            "p50": p50,
+            "p90": p90,
+        },
+        "final_level": np.concatenate(final_level),
+        "final_gold": np.concatenate(final_gold),
+        "elapsed": elapsed,
+        "hero_actions_per_sec": n_heroes * n_actions / elapsed if elapsed else float("inf"),
+    }
+
+
+def time_to_level_summary(time_to_level, percentiles=(10, 50, 90)):
+    # Per-level reach rate and percentiles over the heroes that got there
+    summary = {}
+    for level in range(2, time_to_level.shape[1]):
+        ttl = time_to_level[:, level]
+        ttl = ttl[ttl >= 0]
+        if not len(ttl):
+            break
+        summary[level] = {
+            "reached": len(ttl) / len(time_to_level),
+            **{f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(ttl, percentiles))},
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vectorized Monte Carlo progression simulation")
+    parser.add_argument("heroes", type=int, nargs="?", default=10000)
+    parser.add_argument("actions", type=int, nargs="?", default=500)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--mix", type=float, nargs=3, default=(1, 1, 1),
+                        metavar=("FIGHT", "EXPLORE", "ACCEPT"))
+    parser.add_argument("--content", default=CONTENT_PATH)
+    args = parser.parse_args()
+
+    result = simulate_population(args.heroes, args.actions, args.mix, args.seed,
+                                 catalog=load_catalog(args.content))
+    print(f"{result['heroes']} heroes x {result['actions']} actions "
+          f"in {result['elapsed']:.2f}s ({result['hero_actions_per_sec']:,.0f} hero-actions/s)")
+    for level, row in time_to_level_summary(result["time_to_level"]).items():
+        print(f"level {level}: reached {row['reached']:.1%}, "
+              f"p10 {row['p10']:.0f} / p50 {row['p50']:.0f} / p90 {row['p90']:.0f} actions")
+    curve = result["gold_curve"]
+    print(f"gold after {curve['steps'][-1]} actions: mean {curve['mean'][-1]:.0f}, "
+          f"p50 {curve['p50'][-1]:.0f}")
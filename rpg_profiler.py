@@ -0,0 +1,194 @@
+import csv
+import os
+import time
+import tkinter as tk
+from collections import deque
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".epic_quest", "profile")
+
+# Render paths timed on their own, on top of the callbacks that call them
+SPANS = ("update_stats", "update_quests", "update_inventory", "log_message",
+         "add_floating_text", "show_level_up_animation")
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def count_widgets(widget):
+    children = widget.winfo_children()
+    return len(children) + sum(count_widgets(child) for child in children)
+
+
+class Profiler:
+    # Opt-in instrumentation for AnimatedRPG. Every root.after / after_idle
+    # callback, action button command and render span is timed; widget,
+    # canvas item and pending timer counts are sampled periodically. F12
+    # toggles the overlay, Shift-F12 exports everything to CSV.
+    def __init__(self, game, sample_ms=500, window=2000, history=100000):
+        self.game = game
+        self.root = game.root
+        self.sample_ms = sample_ms
+        self.window = window
+
+        # (time, kind, name, duration, lag) per handled callback
+        self.records = deque(maxlen=history)
+        # (time, quest widgets, inventory widgets, canvas items, pending timers, log lines)
+        self.samples = deque(maxlen=history)
+        self.pending = set()
+        self.started = time.perf_counter()
+
+        self.raw_after = self.root.after
+        self.raw_after_idle = self.root.after_idle
+        self.raw_after_cancel = self.root.after_cancel
+        self.overlay = None
+
+    def install(self):
+        root = self.root
+        root.after = self.after
+        root.after_idle = self.after_idle
+        root.after_cancel = self.after_cancel
+
+        for button, command in self.game.action_commands:
+            button.configure(command=self.wrap("button", command))
+        # Quest dialog buttons look the handler up on the instance when clicked
+        self.game.accept_quest = self.wrap("button", self.game.accept_quest)
+
+        for name in SPANS:
+            setattr(self.game, name, self.wrap("span", getattr(self.game, name)))
+
+        self.overlay = tk.Label(root, bg='black', fg='#4ade80', font=('Courier', 9),
+                                justify='left', anchor='nw')
+        self.overlay.place(relx=1.0, x=-10, y=10, anchor='ne')
+        root.bind('<F12>', lambda e: self.toggle_overlay())
+        root.bind('<Shift-F12>', lambda e: self.export_csv())
+
+        self.raw_after(self.sample_ms, self.sample)
+        return self
+
+    def wrap(self, kind, func, scheduled=None):
+        name = getattr(func, '__qualname__', repr(func))
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                lag = max(0.0, start - scheduled) if scheduled is not None else 0.0
+                self.records.append((end - self.started, kind, name, end - start, lag))
+
+        return timed
+
+    def after(self, ms, func=None, *args):
+        if func is None:
+            return self.raw_after(ms)
+
+        timed = self.wrap("after", func, time.perf_counter() + ms / 1000)
+        job = None
+
+        def run():
+            self.pending.discard(job)
+            timed(*args)
+
+        job = self.raw_after(ms, run)
+        self.pending.add(job)
+        return job
+
+    def after_idle(self, func, *args):
+        timed = self.wrap("idle", func, time.perf_counter())
+        job = None
+
+        def run():
+            self.pending.discard(job)
+            timed(*args)
+
+        job = self.raw_after_idle(run)
+        self.pending.add(job)
+        return job
+
+    def after_cancel(self, job):
+        self.pending.discard(job)
+        self.raw_after_cancel(job)
+
+    def sample(self):
+        game = self.game
+        log_lines = int(game.log_text.index('end-1c').split('.')[0]) - 1
+        self.samples.append((
+            time.perf_counter() - self.started,
+            count_widgets(game.quest_frame),
+            count_widgets(game.inventory_frame),
+            len(game.animation_canvas.find_all()),
+            len(self.pending),
+            log_lines,
+        ))
+        if self.overlay is not None and self.overlay.winfo_ismapped():
+            self.overlay.configure(text=self.summary())
+            self.overlay.lift()
+        self.raw_after(self.sample_ms, self.sample)
+
+    def latency(self, kinds=("after", "idle", "button")):
+        # p50/p95/p99 handler duration and scheduling lag in ms over the
+        # most recent window of callbacks
+        recent = [r for r in list(self.records)[-self.window:] if r[1] in kinds]
+        durations = sorted(r[3] * 1000 for r in recent)
+        lags = sorted(r[4] * 1000 for r in recent)
+        return {
+            "count": len(recent),
+            **{f"p{p}": percentile(durations, p) for p in (50, 95, 99)},
+            **{f"lag_p{p}": percentile(lags, p) for p in (50, 95, 99)},
+        }
+
+    def slowest(self, n=3):
+        # Handlers and spans ranked by their worst recent duration
+        worst = {}
+        for _, _, name, duration, _ in list(self.records)[-self.window:]:
+            worst[name] = max(worst.get(name, 0.0), duration)
+        return sorted(worst.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def summary(self):
+        lat = self.latency()
+        lines = [
+            f"callbacks {lat['count']}",
+            f"run ms  p50 {lat['p50']:.2f} p95 {lat['p95']:.2f} p99 {lat['p99']:.2f}",
+            f"lag ms  p50 {lat['lag_p50']:.2f} p95 {lat['lag_p95']:.2f} p99 {lat['lag_p99']:.2f}",
+        ]
+        if self.samples:
+            _, quests, inventory, items, pending, log_lines = self.samples[-1]
+            lines.append(f"widgets q {quests} inv {inventory}  canvas {items}")
+            lines.append(f"timers {pending}  log lines {log_lines}")
+        for name, duration in self.slowest():
+            lines.append(f"{duration * 1000:7.2f} {name.split('.')[-1][:24]}")
+        return "\n".join(lines)
+
+    def toggle_overlay(self):
+        if self.overlay.winfo_ismapped():
+            self.overlay.place_forget()
+        else:
+            self.overlay.place(relx=1.0, x=-10, y=10, anchor='ne')
+            self.overlay.configure(text=self.summary())
+            self.overlay.lift()
+
+    def export_csv(self, directory=PROFILE_DIR):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        callbacks_path = os.path.join(directory, f"callbacks-{stamp}.csv")
+        samples_path = os.path.join(directory, f"samples-{stamp}.csv")
+
+        with open(callbacks_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time_s", "kind", "name", "duration_ms", "lag_ms"])
+            for t, kind, name, duration, lag in self.records:
+                writer.writerow([f"{t:.4f}", kind, name, f"{duration * 1000:.3f}", f"{lag * 1000:.3f}"])
+
+        with open(samples_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time_s", "quest_widgets", "inventory_widgets",
+                             "canvas_items", "pending_timers", "log_lines"])
+            for row in self.samples:
+                writer.writerow([f"{row[0]:.4f}", *row[1:]])
+
+        return callbacks_path, samples_path
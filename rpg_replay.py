@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+
+from rpg_catalog import CONTENT_PATH, load_catalog
+from rpg_engine import GameEngine
+from rpg_save import (SAVE_DIR, ReplayDivergence, apply_record, iter_records, read_header,
+                      read_snapshot)
+
+
+def replay_journal(journal_path, until=None, catalog=None):
+    # Re-run a recorded session from its seed without any display, checking
+    # every roll against the recording. Stops after `until` actions if given.
+    catalog = catalog if catalog is not None else load_catalog()
+    with open(journal_path, "rb") as f:
+        seed, name, content_size = read_header(f, catalog)
+        data = f.read()
+
+    engine = GameEngine(catalog=catalog)
+    engine.set_content_size(*content_size)
+    engine.seed(seed)
+    engine.new_game(name)
+
+    actions = 0
+    start = time.perf_counter()
+    for op, fields, _ in iter_records(data):
+        if until is not None and actions >= until:
+            break
+        apply_record(engine, op, fields, actions, verify=True)
+        actions += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "seed": seed,
+        "actions": actions,
+        "elapsed": elapsed,
+        "actions_per_sec": actions / elapsed if elapsed else float("inf"),
+        "engine": engine,
+    }
+
+
+def replay_save(directory=SAVE_DIR, catalog=None):
+    # Replay a save up to its latest snapshot and compare the two states
+    snapshot = read_snapshot(os.path.join(directory, "snapshot.bin"))
+    result = replay_journal(os.path.join(directory, "journal.bin"), snapshot["actions"], catalog)
+
+    engine = result["engine"]
+    result["matches"] = (result["actions"] == snapshot["actions"]
+                         and engine.player == snapshot["player"]
+                         and engine.available_quests == snapshot["available_quests"])
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay a saved session headlessly")
+    parser.add_argument("save_dir", nargs="?", default=SAVE_DIR)
+    parser.add_argument("--until", type=int, default=None,
+                        help="stop after this many actions and print the state")
+    parser.add_argument("--content", default=CONTENT_PATH,
+                        help="content catalog the session was recorded with")
+    args = parser.parse_args()
+
+    try:
+        catalog = load_catalog(args.content)
+        if args.until is not None:
+            result = replay_journal(os.path.join(args.save_dir, "journal.bin"), args.until, catalog)
+        else:
+            result = replay_save(args.save_dir, catalog)
+    except (ReplayDivergence, ValueError) as e:
+        print(e)
+        sys.exit(1)
+
+    player = result["engine"].player
+    print(f"Replayed {result['actions']} actions (seed {result['seed']}) "
+          f"in {result['elapsed']:.3f}s, {result['actions_per_sec']:,.0f} actions/s")
+    print(f"{player.name}: level {player.level}, xp {player.xp}/{player.next_xp}, "
+          f"gold {player.gold}, {len(player.quests)} active quests")
+    if "matches" in result:
+        print("Final state matches snapshot" if result["matches"] else "Final state DIFFERS from snapshot")
+        sys.exit(0 if result["matches"] else 1)
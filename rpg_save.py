@@ -0,0 +1,385 @@
+import os
+import pickle
+import random
+import struct
+import time
+import zlib
+from array import array
+
+SAVE_DIR = os.path.join(os.path.expanduser("~"), ".epic_quest", "saves")
+
+JOURNAL_MAGIC = b"EQJ6"
+SNAPSHOT_MAGIC = b"EQS1"
+SNAPSHOT_VERSION = 6
+
+# Snapshot file after the magic: pickle length and CRC-32, then the pickle
+SNAPSHOT_HEADER = struct.Struct("<II")
+
+# Journal header after the magic: game seed, rules checksum, enemy and item
+# counts the game rolls among, and hero name length, then the UTF-8 name
+HEADER = struct.Struct("<QIIIH")
+# Seeds are stored unsigned in 64 bits
+SEED_LIMIT = 2 ** 64
+
+# Journal records: one opcode byte followed by a fixed-size payload
+FIGHT, EXPLORE, ACCEPT_QUEST, COMPLETE_QUEST, FIGHT_BATCH, EXPLORE_BATCH, RESIZE = range(1, 8)
+RECORDS = {
+    FIGHT: struct.Struct("<Hii"),           # enemy, xp, gold
+    EXPLORE: struct.Struct("<H"),           # item
+    ACCEPT_QUEST: struct.Struct("<BIBHHH"),  # slot, replacement id/kind/target/need/level
+    COMPLETE_QUEST: struct.Struct("<"),
+    FIGHT_BATCH: struct.Struct("<II"),      # count, outcome_crc of the enemies
+    EXPLORE_BATCH: struct.Struct("<II"),    # count, outcome_crc of the items
+    RESIZE: struct.Struct("<IIIQ"),         # enemy count, item count, rules checksum, quest seed
+}
+
+
+class SaveError(Exception):
+    # A save on disk that cannot be loaded, whatever went wrong reading it
+    pass
+
+
+class ReplayDivergence(Exception):
+    def __init__(self, index, action, recorded, rolled):
+        super().__init__(f"Action {index} ({action}) diverged: "
+                         f"recorded {recorded!r}, replay rolled {rolled!r}")
+        self.index = index
+        self.action = action
+        self.recorded = recorded
+        self.rolled = rolled
+
+
+def outcome_crc(ids):
+    # Fingerprint of a batch's rolls, enough to verify a replay without
+    # storing every enemy or item
+    return zlib.crc32(array("H", ids).tobytes())
+
+
+def check_content(catalog, n_enemies, n_items, checksum, source):
+    # The catalog may have grown since, but its first n_enemies enemies and
+    # n_items items must still play by the recorded rules
+    if (n_enemies > len(catalog.enemies) or n_items > len(catalog.items)
+            or catalog.rules_checksum(n_enemies, n_items) != checksum):
+        raise ValueError(f"{source} was recorded with different game content")
+
+
+def read_header(f, catalog):
+    # Returns (seed, hero name, (enemy count, item count)) once the journal
+    # is known to have been recorded with rules this content still has
+    if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+        raise ValueError(f"Not a journal file: {f.name}")
+    seed, checksum, n_enemies, n_items, name_length = HEADER.unpack(f.read(HEADER.size))
+    check_content(catalog, n_enemies, n_items, checksum, f"Journal {f.name}")
+    return seed, f.read(name_length).decode("utf-8"), (n_enemies, n_items)
+
+
+# Decoder per opcode byte, None for bytes that are not an opcode
+DECODERS = [None] * 256
+for _op, _record in RECORDS.items():
+    DECODERS[_op] = (_record.unpack_from, 1 + _record.size)
+
+
+def iter_records(data):
+    # Yield (opcode, fields, end offset), stopping at a truncated record
+    pos = 0
+    size = len(data)
+    while pos < size:
+        op = data[pos]
+        decoder = DECODERS[op]
+        if decoder is None:
+            return
+        unpack, length = decoder
+        end = pos + length
+        if end > size:
+            return
+        yield op, unpack(data, pos + 1), end
+        pos = end
+
+
+def apply_record(engine, op, fields, index=0, verify=False):
+    # Re-execute one journaled action. The engine rolls its dice exactly as
+    # the live game did, so its rng stays in step with the recording; the
+    # recorded outcome is what gets applied (batches only record a
+    # fingerprint, so their rolls are applied). With verify, a roll that
+    # does not match the recording raises ReplayDivergence.
+    if op == FIGHT:
+        enemy, xp_gain, gold_gain = fields
+        recorded = (enemy, xp_gain, gold_gain)
+        rolled = engine.start_fight()
+        if verify and rolled != recorded:
+            raise ReplayDivergence(index, "fight", recorded, rolled)
+        engine.complete_fight(*recorded)
+    elif op == EXPLORE:
+        recorded = fields[0]
+        rolled = engine.start_explore()
+        if verify and rolled != recorded:
+            raise ReplayDivergence(index, "explore", recorded, rolled)
+        engine.complete_explore(recorded)
+    elif op == ACCEPT_QUEST:
+        slot, quest_id, kind, target, need, level = fields
+        rolled = engine.make_quest(engine.player.level)
+        recorded = engine.build_quest(kind, target, need, level, quest_id)
+        if verify and rolled != recorded:
+            raise ReplayDivergence(index, "accept_quest", recorded, rolled)
+        engine.accept_quest(engine.available_quests[slot], recorded)
+    elif op == FIGHT_BATCH:
+        count, recorded = fields
+        rolled = engine.start_fights(count)
+        if verify and outcome_crc(rolled) != recorded:
+            raise ReplayDivergence(index, "fight_batch", recorded, outcome_crc(rolled))
+        engine.complete_fights(rolled)
+    elif op == EXPLORE_BATCH:
+        count, recorded = fields
+        rolled = engine.start_explores(count)
+        if verify and outcome_crc(rolled) != recorded:
+            raise ReplayDivergence(index, "explore_batch", recorded, outcome_crc(rolled))
+        engine.complete_explores(rolled)
+    elif op == RESIZE:
+        n_enemies, n_items, checksum, quest_seed = fields
+        check_content(engine.catalog, n_enemies, n_items, checksum, f"Action {index} (resize)")
+        engine.set_content_size(n_enemies, n_items, quest_seed)
+    else:
+        engine.collect_done_quests()
+
+
+def read_snapshot(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    start = len(SNAPSHOT_MAGIC) + SNAPSHOT_HEADER.size
+    if len(data) < start or not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError(f"Not a snapshot file: {path}")
+    length, crc = SNAPSHOT_HEADER.unpack_from(data, len(SNAPSHOT_MAGIC))
+    payload = data[start:]
+    if len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError(f"Snapshot {path} is damaged")
+    snapshot = pickle.loads(payload)
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported save version in {path}")
+    return snapshot
+
+
+def capture_state(engine):
+    # Everything needed to continue this game, dice included
+    return {
+        "player": engine.player,
+        "available_quests": engine.available_quests,
+        "next_quest_id": engine.next_quest_id,
+        "rng_state": engine.rng.getstate(),
+        "quest_stream": engine.quest_stream_state(),
+        "content_size": engine.target_counts,
+        "content_checksum": engine.catalog.rules_checksum(*engine.target_counts),
+    }
+
+
+def restore_state(engine, state):
+    check_content(engine.catalog, *state["content_size"], state["content_checksum"], "Save")
+    engine.set_content_size(*state["content_size"])
+    engine.restore(state["player"], state["available_quests"], state["next_quest_id"])
+    engine.rng.setstate(state["rng_state"])
+    engine.set_quest_stream_state(state["quest_stream"])
+
+
+class SaveGame:
+    # Periodic pickled snapshots plus an append-only binary journal of every
+    # action since the game began. Each snapshot remembers the journal offset
+    # it covers, so loading only replays the records written after it.
+    # With an io pool (a single-worker WorkerPool) the file writes happen in
+    # order on that thread; state is always captured on the caller's thread.
+    def __init__(self, engine, directory=SAVE_DIR, snapshot_every=1000, io=None):
+        self.engine = engine
+        self.io = io
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.journal_path = os.path.join(directory, "journal.bin")
+        os.makedirs(directory, exist_ok=True)
+
+        self.journal = None
+        self.journal_offset = 0
+        self.seed = None
+        self.actions = 0
+        self.snapshot_actions = 0
+        engine.on(self.on_engine_event)
+
+    def exists(self):
+        return os.path.exists(self.snapshot_path) and os.path.exists(self.journal_path)
+
+    def incomplete(self):
+        # Half a save, e.g. a journal whose snapshot was lost. It cannot be
+        # loaded, but a journal can still be replayed from its seed.
+        return os.path.exists(self.snapshot_path) != os.path.exists(self.journal_path)
+
+    def backup(self):
+        # Move a save that could not be loaded out of the way, so starting
+        # a new game never overwrites it. Returns the backup paths.
+        self.close_journal()
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        moved = []
+        for path in (self.snapshot_path, self.journal_path):
+            if os.path.exists(path):
+                backup = f"{path}.{stamp}.bak"
+                n = 1
+                while os.path.exists(backup):
+                    n += 1
+                    backup = f"{path}.{stamp}-{n}.bak"
+                os.replace(path, backup)
+                moved.append(backup)
+        return moved
+
+    def new_game(self, name, seed=None):
+        # The seed is all a replay needs to regenerate the starting state
+        if seed is None:
+            seed = random.getrandbits(63)
+        elif not 0 <= seed < SEED_LIMIT:
+            raise ValueError(f"Seed must be from 0 to {SEED_LIMIT - 1}, got {seed}")
+        self.seed = seed
+        engine = self.engine
+        # A failed load may have left the counts of an older, smaller save
+        catalog = engine.catalog
+        engine.set_content_size(len(catalog.enemies), len(catalog.items))
+        engine.seed(seed)
+        engine.new_game(name)
+
+        encoded = name.encode("utf-8")
+        counts = engine.target_counts
+        header = JOURNAL_MAGIC + HEADER.pack(seed, catalog.rules_checksum(*counts),
+                                             *counts, len(encoded)) + encoded
+        self.run_io(self.create_journal, header)
+        self.journal_offset = len(header)
+        self.actions = 0
+        self.write_snapshot()
+
+    def run_io(self, func, *args):
+        if self.io is not None:
+            self.io.submit(func, *args, error=self.io_failed)
+        else:
+            func(*args)
+
+    def io_failed(self, e):
+        self.engine.log(f"⚠️ Save failed: {e}", "red")
+
+    def create_journal(self, header):
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = open(self.journal_path, "wb")
+        self.append_journal(header)
+
+    def append_journal(self, data):
+        self.journal.write(data)
+        self.journal.flush()
+
+    def store_snapshot(self, data):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def load(self):
+        # Any way the save fails to read or restore surfaces as SaveError
+        try:
+            self.restore()
+        except Exception as e:
+            raise SaveError(str(e) or type(e).__name__) from e
+
+    def restore(self):
+        snapshot = read_snapshot(self.snapshot_path)
+
+        # Replay quietly: nothing should be logged, animated or journaled again
+        engine = self.engine
+        listeners = engine.listeners
+        engine.listeners = []
+        try:
+            restore_state(engine, snapshot)
+            with open(self.journal_path, "rb") as f:
+                self.seed, _, _ = read_header(f, engine.catalog)
+                f.seek(snapshot["journal_offset"])
+                data = f.read()
+            end = 0
+            replayed = 0
+            for op, fields, end in iter_records(data):
+                apply_record(engine, op, fields)
+                replayed += 1
+        finally:
+            engine.listeners = listeners
+
+        self.actions = snapshot["actions"] + replayed
+        self.snapshot_actions = snapshot["actions"]
+
+        # Drop a record cut short by a crash, then keep appending
+        end += snapshot["journal_offset"]
+        self.journal = open(self.journal_path, "r+b")
+        self.journal.truncate(end)
+        self.journal.seek(end)
+        self.journal_offset = end
+        self.grow_content()
+        engine.refresh()
+
+    def grow_content(self):
+        # Entries appended to the content since this game was saved join it
+        # from here on; the journal records where, for replays
+        engine = self.engine
+        full = (len(engine.catalog.enemies), len(engine.catalog.items))
+        if engine.target_counts == full:
+            return
+        quest_seed = random.getrandbits(63)
+        engine.set_content_size(*full, quest_seed)
+        self.write_record(RESIZE, RECORDS[RESIZE].pack(
+            *full, engine.catalog.rules_checksum(*full), quest_seed))
+
+    def on_engine_event(self, event, *args):
+        if event != "action" or not self.journal_offset:
+            return
+
+        name = args[0]
+        if name == "fight":
+            payload = RECORDS[FIGHT].pack(*args[1:])
+            op = FIGHT
+        elif name == "explore":
+            payload = RECORDS[EXPLORE].pack(args[1])
+            op = EXPLORE
+        elif name == "accept_quest":
+            slot, quest = args[1:]
+            payload = RECORDS[ACCEPT_QUEST].pack(
+                slot, quest.id, quest.kind, quest.target, quest.need, quest.level)
+            op = ACCEPT_QUEST
+        elif name == "fight_batch" or name == "explore_batch":
+            rolled = args[1]
+            op = FIGHT_BATCH if name == "fight_batch" else EXPLORE_BATCH
+            payload = RECORDS[op].pack(len(rolled), outcome_crc(rolled))
+        else:
+            payload = b""
+            op = COMPLETE_QUEST
+        self.write_record(op, payload)
+
+    def write_record(self, op, payload):
+        record = bytes((op,)) + payload
+        self.run_io(self.append_journal, record)
+        self.journal_offset += len(record)
+        self.actions += 1
+        if self.actions - self.snapshot_actions >= self.snapshot_every:
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        engine = self.engine
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "actions": self.actions,
+            "journal_offset": self.journal_offset,
+            **capture_state(engine),
+        }
+        # Pickle here so the io thread never sees state that is still changing
+        data = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+        header = SNAPSHOT_MAGIC + SNAPSHOT_HEADER.pack(len(data), zlib.crc32(data))
+        self.run_io(self.store_snapshot, header + data)
+        self.snapshot_actions = self.actions
+
+    def close(self):
+        if self.journal_offset:
+            self.write_snapshot()
+            self.run_io(self.close_journal)
+            self.journal_offset = 0
@@ -0,0 +1,334 @@
+import asyncio
+import json
+import os
+import pickle
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rpg_catalog import CONTENT_PATH, load_catalog
+from rpg_client import DEFAULT_PORT
+from rpg_engine import GameEngine
+from rpg_save import SNAPSHOT_VERSION, capture_state, restore_state
+
+SERVER_DB = os.path.join(os.path.expanduser("~"), ".epic_quest", "server", "sessions.db")
+
+# Biggest batch one FIGHT / EXPLORE request may ask for
+MAX_REPEAT = 1000
+# Lines are JSON messages; a full state with many quests can be long
+LINE_LIMIT = 1 << 20
+
+PARTS = ("stats", "quests", "inventory")
+
+
+def encode_parts(engine, changed):
+    # Wire form of the changed parts of a game, see rpg_client.RemoteEngine.
+    # changed maps each part to the quest or item ids that changed, or to
+    # None to send the whole part.
+    player = engine.player
+    delta = {}
+    if "stats" in changed:
+        delta["stats"] = [player.name, player.level, player.xp, player.next_xp, player.gold]
+    if "quests" in changed:
+        quests = player.quests
+        ids = changed["quests"]
+        if ids is None:
+            delta["quests"] = [q.fields() for q in quests.values()]
+        else:
+            delta["quest_updates"] = [quests[i].fields() for i in ids if i in quests]
+            delta["quests_removed"] = [i for i in ids if i not in quests]
+    if "inventory" in changed:
+        counts = player.inventory.counts
+        ids = changed["inventory"]
+        if ids is None:
+            delta["inventory"] = counts.tolist()
+        else:
+            delta["inventory_updates"] = [[i, counts[i]] for i in ids]
+    return delta
+
+
+class Session:
+    # One hero held in memory. Engine events raised while a request runs are
+    # collected here and sent back as that request's reply.
+    __slots__ = ("name", "engine", "logs", "level_up", "changed", "available", "connected",
+                 "last_seen")
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.logs = []
+        self.level_up = None
+        # Part -> changed ids in order, or None when all of it is resent
+        self.changed = {}
+        # Ids of the available quests the client was last sent
+        self.available = None
+        self.connected = False
+        self.last_seen = time.monotonic()
+        engine.on(self.on_engine_event)
+
+    def on_engine_event(self, event, *args):
+        if event == "log":
+            self.logs.append(args)
+        elif event == "level_up":
+            level, gained = args
+            if self.level_up is not None:
+                gained += self.level_up[1]
+            self.level_up = (level, gained)
+        elif event == "changed":
+            part = args[0]
+            if len(args) == 1:
+                self.changed[part] = None
+            else:
+                ids = self.changed.setdefault(part, {})
+                if ids is not None:
+                    ids.update(dict.fromkeys(args[1]))
+
+    def resend(self):
+        # The client's copy is gone or stale: send everything next reply
+        self.changed = dict.fromkeys(PARTS)
+        self.available = None
+
+    def delta(self):
+        reply = encode_parts(self.engine, self.changed)
+        # Offers only change when one is accepted, so most replies skip them
+        available = [q.id for q in self.engine.available_quests]
+        if available != self.available:
+            reply["available"] = [q.fields() for q in self.engine.available_quests]
+            self.available = available
+        if self.logs:
+            reply["log"] = self.logs
+        if self.level_up is not None:
+            reply["level_up"] = self.level_up
+        self.logs = []
+        self.level_up = None
+        self.changed = {}
+        return reply
+
+
+class SessionStore:
+    # Latest state of every hero in one SQLite file. Writes are grouped:
+    # each flush saves all dirty sessions in a single transaction on the
+    # store's own thread.
+    def __init__(self, path=SERVER_DB):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sessions "
+                        "(name TEXT PRIMARY KEY, state BLOB NOT NULL, saved REAL NOT NULL)")
+        self.db.commit()
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def load(self, name):
+        row = self.db.execute("SELECT state FROM sessions WHERE name = ?", (name,)).fetchone()
+        return None if row is None else pickle.loads(row[0])
+
+    def save_many(self, rows):
+        now = time.time()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                                [(name, blob, now) for name, blob in rows])
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.db.close()
+
+
+class GameServer:
+    def __init__(self, store, catalog=None, flush_ms=1000, idle_s=300):
+        self.store = store
+        self.catalog = catalog if catalog is not None else load_catalog()
+        self.flush_ms = flush_ms
+        self.idle_s = idle_s
+        self.sessions = {}
+        self.dirty = set()
+        self.loading = {}
+        self.server = None
+        self.flusher = None
+        self.requests = 0
+        self.flushes = 0
+        self.saved = 0
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle, host, port, limit=LINE_LIMIT)
+        self.flusher = asyncio.create_task(self.flush_loop())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self.flusher is not None:
+            self.flusher.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        await self.flush()
+
+    async def flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_ms / 1000)
+            await self.flush()
+            self.evict_idle()
+
+    async def flush(self):
+        if not self.dirty:
+            return
+        # Capture on the event loop, between requests, then write elsewhere
+        rows = [(s.name, pickle.dumps({"version": SNAPSHOT_VERSION, **capture_state(s.engine)},
+                                      protocol=pickle.HIGHEST_PROTOCOL))
+                for s in self.dirty]
+        self.dirty = set()
+        await self.store.run(self.store.save_many, rows)
+        self.flushes += 1
+        self.saved += len(rows)
+
+    def evict_idle(self):
+        # Disconnected heroes already written out are dropped from memory
+        cutoff = time.monotonic() - self.idle_s
+        idle = [name for name, s in self.sessions.items()
+                if not s.connected and s.last_seen < cutoff and s not in self.dirty]
+        for name in idle:
+            del self.sessions[name]
+
+    async def session(self, name):
+        session = self.sessions.get(name)
+        if session is not None:
+            return session
+        # Several clients may join the same hero while it is being loaded
+        pending = self.loading.get(name)
+        if pending is None:
+            pending = self.loading[name] = asyncio.ensure_future(self.store.run(self.store.load, name))
+        try:
+            state = await pending
+        finally:
+            self.loading.pop(name, None)
+        session = self.sessions.get(name)
+        if session is not None:
+            return session
+
+        engine = GameEngine(random.Random(), self.catalog)
+        new = state is None or state.get("version") != SNAPSHOT_VERSION
+        if new:
+            engine.seed(random.getrandbits(63))
+            engine.new_game(name)
+        else:
+            restore_state(engine, state)
+            # Server sessions keep no journal, so entries appended to the
+            # content join at once
+            full = (len(self.catalog.enemies), len(self.catalog.items))
+            if engine.target_counts != full:
+                engine.set_content_size(*full, random.getrandbits(63))
+        session = self.sessions[name] = Session(name, engine)
+        if new:
+            self.dirty.add(session)
+        return session
+
+    async def handle(self, reader, writer):
+        session = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Over LINE_LIMIT: the rest of that line cannot be told
+                    # apart from the next message, so answer and hang up
+                    await self.send(writer, {"error": f"Request longer than {LINE_LIMIT} bytes"})
+                    break
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line)
+                    if session is None:
+                        session, reply = await self.hello(msg)
+                    else:
+                        reply = self.dispatch(session, msg)
+                except (ValueError, KeyError, TypeError, IndexError) as e:
+                    reply = {"error": str(e)}
+                await self.send(writer, reply)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if session is not None:
+                session.connected = False
+                session.last_seen = time.monotonic()
+            writer.close()
+
+    async def send(self, writer, reply):
+        writer.write(json.dumps(reply, separators=(",", ":"), ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+
+    async def hello(self, msg):
+        if msg.get("op") != "hello":
+            raise ValueError("Send hello first")
+        if msg.get("content") != self.catalog.checksum:
+            raise ValueError("Client content does not match the server's")
+        name = str(msg["name"])
+        session = await self.session(name)
+        if session.connected:
+            raise ValueError(f"{name} is already playing")
+        session.connected = True
+        session.resend()
+        return session, session.delta()
+
+    def dispatch(self, session, msg):
+        op = msg["op"]
+        engine = session.engine
+        if op == "fight" or op == "explore":
+            count = int(msg.get("count", 1))
+            if not 1 <= count <= MAX_REPEAT:
+                raise ValueError(f"count must be 1-{MAX_REPEAT}")
+            if op == "fight":
+                if count == 1:
+                    engine.complete_fight(*engine.start_fight())
+                else:
+                    engine.complete_fights(engine.start_fights(count))
+            elif count == 1:
+                engine.complete_explore(engine.start_explore())
+            else:
+                engine.complete_explores(engine.start_explores(count))
+        elif op == "accept_quest":
+            slot = int(msg["slot"])
+            if not 0 <= slot < len(engine.available_quests):
+                raise ValueError(f"slot must be 0-{len(engine.available_quests) - 1}")
+            engine.accept_quest(engine.available_quests[slot])
+        elif op == "collect_quests":
+            engine.collect_done_quests()
+        elif op == "state":
+            session.resend()
+        else:
+            raise ValueError(f"Unknown op: {op}")
+
+        self.requests += 1
+        session.last_seen = time.monotonic()
+        self.dirty.add(session)
+        return session.delta()
+
+
+async def serve(host, port, db, content):
+    store = SessionStore(db)
+    server = GameServer(store, load_catalog(content))
+    address = await server.start(host, port)
+    print(f"Serving on {address[0]}:{address[1]}, sessions in {db}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        store.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Host many heroes from one process")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=SERVER_DB)
+    parser.add_argument("--content", default=CONTENT_PATH)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.db, args.content))
+    except KeyboardInterrupt:
+        pass
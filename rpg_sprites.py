@@ -0,0 +1,147 @@
+import tkinter as tk
+from collections import OrderedDict
+
+# Short overlay glyphs (stars, sparkles) rasterized once with Pillow into
+# PhotoImages, so the canvas draws image items instead of shaping the emoji
+# font for every effect. Pillow is optional: without it, or without a font
+# that has the glyph, get() returns None and callers keep using text items.
+
+# Looked up by file name in the system font directories
+EMOJI_FONTS = ("NotoColorEmoji.ttf", "seguiemj.ttf", "Apple Color Emoji.ttc")
+TEXT_FONTS = ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf", "Helvetica.ttc")
+BOLD_TEXT_FONTS = ("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf")
+# Bitmap emoji fonts only load at their native size; sprites are scaled down
+EMOJI_SIZES = (109, 160, 64)
+
+EMOJI_RANGES = ((0x2600, 0x27BF), (0x2B00, 0x2BFF), (0x1F000, 0x1FAFF))
+
+# Longer texts are log messages, nearly all unique, so not worth caching
+MAX_SPRITE_CHARS = 3
+
+
+def is_emoji(text):
+    return any(lo <= ord(ch) <= hi for ch in text for lo, hi in EMOJI_RANGES)
+
+
+class GlyphRenderer:
+    def __init__(self, pixels_per_point):
+        from PIL import Image, ImageDraw, ImageFont
+
+        self.Image = Image
+        self.ImageDraw = ImageDraw
+        self.ImageFont = ImageFont
+        self.pixels_per_point = pixels_per_point
+        # (emoji, pixel size, bold) -> (font, size it renders at), or None
+        self.fonts = {}
+        # Mask of a glyph no font has, per text font
+        self.missing = {}
+
+    def load_font(self, emoji, px, bold):
+        key = (emoji, px, bold)
+        if key in self.fonts:
+            return self.fonts[key]
+
+        loaded = None
+        if emoji:
+            candidates = [(name, size) for name in EMOJI_FONTS for size in EMOJI_SIZES]
+        else:
+            names = (BOLD_TEXT_FONTS + TEXT_FONTS) if bold else TEXT_FONTS
+            candidates = [(name, px) for name in names]
+        for name, size in candidates:
+            try:
+                loaded = (self.ImageFont.truetype(name, size), size)
+                break
+            except OSError:
+                continue
+        self.fonts[key] = loaded
+        return loaded
+
+    @staticmethod
+    def mask(font, ch):
+        mask = font.getmask(ch)
+        return mask.size, tuple(mask)
+
+    def covers(self, font, text):
+        # A glyph the font lacks renders as the same box as a code point
+        # nothing has
+        missing = self.missing.get(font)
+        if missing is None:
+            missing = self.missing[font] = self.mask(font, "\U0010fffd")
+        return all(self.mask(font, ch) != missing for ch in text if ch != "\ufe0f")
+
+    def render(self, text, fill, font):
+        # Returns an RGBA PIL image of text in the given Tk font, or None
+        size = font[1]
+        bold = "bold" in font[2:]
+        px = -size if size < 0 else round(size * self.pixels_per_point)
+        emoji = is_emoji(text)
+        loaded = self.load_font(emoji, px, bold)
+        if loaded is None:
+            return None
+        pil_font, native = loaded
+        # Emoji fonts cover their blocks; text fonts fall back to a box
+        if not emoji and not self.covers(pil_font, text):
+            return None
+
+        left, top, right, bottom = pil_font.getbbox(text)
+        if right <= left or bottom <= top:
+            return None
+        image = self.Image.new("RGBA", (right - left, bottom - top), (0, 0, 0, 0))
+        self.ImageDraw.Draw(image).text((-left, -top), text, font=pil_font, fill=fill,
+                                        embedded_color=emoji)
+        if native != px:
+            scale = px / native
+            image = image.resize((max(1, round(image.width * scale)),
+                                  max(1, round(image.height * scale))), self.Image.LANCZOS)
+        return image
+
+
+class SpriteCache:
+    # PhotoImages keyed by (text, fill, font), least recently used evicted
+    # past capacity. Glyphs that cannot be rendered are cached as None so
+    # they are not retried on every effect.
+    def __init__(self, root, capacity=64):
+        self.root = root
+        self.capacity = capacity
+        self.sprites = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.renderer = None
+        self.photo = None
+        try:
+            from PIL import ImageTk
+        except ImportError:
+            return
+        self.renderer = GlyphRenderer(root.winfo_fpixels('1p'))
+        self.photo = ImageTk.PhotoImage
+
+    def get(self, text, fill, font):
+        if self.renderer is None or len(text) > MAX_SPRITE_CHARS:
+            return None
+        key = (text, fill, font)
+        try:
+            sprite = self.sprites[key]
+        except KeyError:
+            self.misses += 1
+            sprite = self.sprites[key] = self.render(text, fill, font)
+            if len(self.sprites) > self.capacity:
+                self.sprites.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            self.sprites.move_to_end(key)
+        return sprite
+
+    def render(self, text, fill, font):
+        try:
+            image = self.renderer.render(text, fill, font)
+            return None if image is None else self.photo(image, master=self.root)
+        except (OSError, ValueError, tk.TclError):
+            return None
+
+    def warm(self, glyphs):
+        # Render (text, fill, font) glyphs ahead of their first effect
+        for text, fill, font in glyphs:
+            self.get(text, fill, font)
@@ -0,0 +1,201 @@
+import copy
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from rpg_catalog import CONTENT_PATH, Catalog, read_content
+from rpg_montecarlo import AVAILABLE_QUESTS, MAX_NEED, simulate_population
+
+# Economy balancing: every cell of a parameter grid is one Monte Carlo
+# population run with the content tweaked, fanned out over a process pool.
+# All cells share one seed, so differences between cells come from the
+# parameters rather than the dice.
+#
+# Parameters, each overriding the content file for one cell:
+#   growth, first_xp            level curve (XP per level-up, x growth)
+#   fight_xp, fight_gold        reward of every enemy
+#   <kind>_need                 [min, max] count for hunt/collect quests
+#   <kind>_xp, <kind>_gold      [base, per_level] quest rewards
+#   available_quests            quests offered at once
+
+QUEST_FIELDS = ("need", "xp", "gold")
+
+
+def expand_grid(grid):
+    # {"growth": [1.3, 1.5], "fight_xp": [10, 20]} -> one dict per combination
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def check_number(name, value, low, high=None, whole=True):
+    # A JSON number within [low, high]; whole numbers come back as int
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    if whole and not float(value).is_integer():
+        raise ValueError(f"{name} must be a whole number, got {value!r}")
+    if value < low or (high is not None and value > high):
+        bound = f"from {low} to {high}" if high is not None else f"at least {low}"
+        raise ValueError(f"{name} must be {bound}, got {value!r}")
+    return int(value) if whole else value
+
+
+def apply_params(content, params):
+    # Content data with this cell's overrides, plus the available quest count
+    content = copy.deepcopy(content)
+    available = AVAILABLE_QUESTS
+    for name, value in params.items():
+        if name == "growth":
+            content.setdefault("levels", {})[name] = check_number(name, value, 0, whole=False)
+        elif name == "first_xp":
+            content.setdefault("levels", {})[name] = check_number(name, value, 1)
+        elif name in ("fight_xp", "fight_gold"):
+            value = check_number(name, value, 0)
+            for enemy in content["enemies"]:
+                enemy[name[len("fight_"):]] = value
+        elif name == "available_quests":
+            available = check_number(name, value, 1)
+        else:
+            kind, _, field = name.rpartition("_")
+            if kind not in content["quest_types"] or field not in QUEST_FIELDS:
+                raise ValueError(f"Unknown sweep parameter: {name}")
+            if not isinstance(value, list) or len(value) != 2:
+                raise ValueError(f"{name} takes two numbers, got {value!r}")
+            if field == "need":
+                low, high = (check_number(name, v, 1, MAX_NEED) for v in value)
+                if low > high:
+                    raise ValueError(f"{name} is [min, max], got {value!r}")
+            else:
+                low, high = (check_number(name, v, 0) for v in value)
+            content["quest_types"][kind][field] = [low, high]
+    return content, available
+
+
+def summarize(result, levels):
+    # Per-cell metrics: final level and gold, and how fast heroes level
+    final_level = result["final_level"]
+    final_gold = result["final_gold"]
+    ttl = result["time_to_level"]
+    metrics = {
+        "level_mean": float(final_level.mean()),
+        "level_p50": float(np.median(final_level)),
+        "gold_mean": float(final_gold.mean()),
+        "gold_p10": float(np.percentile(final_gold, 10)),
+        "gold_p50": float(np.median(final_gold)),
+        "gold_p90": float(np.percentile(final_gold, 90)),
+    }
+    for level in levels:
+        reached = ttl[:, level]
+        reached = reached[reached >= 0]
+        metrics[f"reach_{level}"] = len(reached) / len(ttl)
+        metrics[f"actions_to_{level}_p50"] = float(np.median(reached)) if len(reached) else None
+    return metrics
+
+
+# Set once per worker process so each task only carries its parameters
+_content = None
+
+
+def _init_worker(content):
+    global _content
+    _content = content
+
+
+def run_cell(task):
+    index, params, heroes, actions, strategy, seed, levels = task
+    content, available = apply_params(_content, params)
+    result = simulate_population(heroes, actions, strategy, seed, max_level=max(levels),
+                                 n_samples=1, catalog=Catalog(content),
+                                 available_quests=available)
+    return index, params, summarize(result, levels)
+
+
+def sweep(grid, heroes=1000, actions=500, strategy=(1, 1, 1), seed=0, levels=(5, 10),
+          content=None, processes=None, chunksize=None):
+    # Yields (index, params, metrics) as cells finish, in completion order
+    content = content if content is not None else read_content()
+    cells = expand_grid(grid)
+    # Fail on a bad parameter here rather than in every worker
+    for params in {json.dumps(p, sort_keys=True): p for p in cells}.values():
+        Catalog(apply_params(content, params)[0])
+
+    processes = processes or os.cpu_count() or 1
+    if chunksize is None:
+        # Small enough to keep every core busy to the end, big enough that
+        # short cells are not dominated by pickling
+        chunksize = max(1, min(16, len(cells) // (processes * 8)))
+    tasks = ((i, params, heroes, actions, strategy, seed, tuple(levels))
+             for i, params in enumerate(cells))
+
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(content,)) as pool:
+        yield from pool.imap_unordered(run_cell, tasks, chunksize)
+
+
+def load_grid(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def parse_param(text):
+    # NAME=JSON_LIST, e.g. growth=[1.3,1.5] or hunt_need=[[2,4],[3,6]]
+    name, sep, values = text.partition("=")
+    if not sep:
+        raise ValueError(f"Expected NAME=[values], got {text!r}")
+    values = json.loads(values)
+    if not isinstance(values, list):
+        values = [values]
+    return name, values
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Sweep economy parameters across all cores")
+    parser.add_argument("--grid", default=None, help="JSON file of {parameter: [values]}")
+    parser.add_argument("-p", "--param", action="append", default=[], metavar="NAME=[VALUES]",
+                        help="add a grid axis, e.g. growth=[1.3,1.5,1.7]")
+    parser.add_argument("--heroes", type=int, default=1000, help="heroes per cell")
+    parser.add_argument("--actions", type=int, default=500, help="actions per hero")
+    parser.add_argument("--mix", type=float, nargs=3, default=(1, 1, 1),
+                        metavar=("FIGHT", "EXPLORE", "ACCEPT"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--levels", type=int, nargs="+", default=[5, 10],
+                        help="levels to report reach rate and time-to-level for")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--content", default=CONTENT_PATH)
+    parser.add_argument("-o", "--output", default=None,
+                        help="JSON lines file, one cell per line as it finishes")
+    args = parser.parse_args()
+
+    try:
+        grid = load_grid(args.grid) if args.grid else {}
+        grid.update(parse_param(p) for p in args.param)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Bad grid: {e}")
+    if not grid:
+        sys.exit("Nothing to sweep: give --grid or --param")
+
+    n_cells = len(expand_grid(grid))
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    start = time.perf_counter()
+    try:
+        for done, (index, params, metrics) in enumerate(
+                sweep(grid, args.heroes, args.actions, args.mix, args.seed, args.levels,
+                      read_content(args.content), args.processes), 1):
+            out.write(json.dumps({"cell": index, **params, **metrics}) + "\n")
+            out.flush()
+            if out is not sys.stdout:
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{n_cells} cells, {elapsed:.0f}s, "
+                      f"eta {elapsed / done * (n_cells - done):.0f}s", end="", file=sys.stderr)
+    except ValueError as e:
+        sys.exit(f"Bad grid: {e}")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+            print(file=sys.stderr)
@@ -0,0 +1,64 @@
+import queue
+from threading import Thread
+
+
+class WorkerPool:
+    # Runs non-UI work on background threads. Results come back through a
+    # queue that the Tk loop drains from one periodic after() poll, so
+    # callbacks always run on the main thread and may touch widgets. A pool
+    # with a single worker runs its tasks strictly in submission order.
+    def __init__(self, root, workers=2, poll_ms=20, name="worker"):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.tasks = queue.Queue()
+        self.results = queue.Queue()
+        self.threads = [Thread(target=self.work, name=f"{name}-{i}", daemon=True)
+                        for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+        self.job = root.after(poll_ms, self.poll)
+
+    def submit(self, func, *args, callback=None, error=None):
+        # callback(result) or error(exception) run later on the Tk thread. A
+        # failure without an error handler goes to Tk's own callback error
+        # report, like an exception raised in any other Tk callback.
+        self.tasks.put((func, args, callback, error))
+
+    def work(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            func, args, callback, error = task
+            try:
+                result = func(*args)
+            except Exception as e:
+                self.results.put((error, e, True))
+            else:
+                self.results.put((callback, result, False))
+
+    def poll(self):
+        self.drain()
+        self.job = self.root.after(self.poll_ms, self.poll)
+
+    def drain(self):
+        while True:
+            try:
+                handler, value, failed = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if handler is not None:
+                handler(value)
+            elif failed:
+                self.root.report_callback_exception(type(value), value, value.__traceback__)
+
+    def shutdown(self, wait=True):
+        if self.job is not None:
+            self.root.after_cancel(self.job)
+            self.job = None
+        for _ in self.threads:
+            self.tasks.put(None)
+        if wait:
+            for thread in self.threads:
+                thread.join()
+            self.drain()
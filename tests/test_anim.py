@@ -0,0 +1,59 @@
+from rpg_anim import Animator
+from rpg_clock import MANUAL, GameClock
+
+
+class FakeCanvas:
+    # Just enough of a Tk canvas for the animator
+    def __init__(self):
+        self.items = 0
+
+    def create_text(self, *args, **kwargs):
+        self.items += 1
+        return self.items
+
+    create_image = create_text
+
+    def coords(self, *args):
+        pass
+
+    def itemconfigure(self, *args, **kwargs):
+        pass
+
+    def delete(self, *args):
+        pass
+
+
+def make_animator():
+    clock = GameClock(None, MANUAL)
+    return clock, Animator(clock, FakeCanvas())
+
+
+def add(animator, frames=10):
+    return animator.add_text(0, 0, "+1 XP", "gold", None, frames=frames, dy=-2)
+
+
+def test_slow_last_frame_does_not_drop_later_text():
+    clock, animator = make_animator()
+    add(animator, frames=1)
+    # Every frame is over budget, and the last tween ends in this one
+    animator.frame_budget = -1
+    assert clock.step()
+    assert not animator.tweens
+
+    animator.frame_budget = 1.0
+    for _ in range(animator.max_tweens):
+        assert add(animator) is not None
+    assert animator.dropped == 0
+
+
+def test_slow_frame_drops_text_while_frames_run():
+    clock, animator = make_animator()
+    for _ in range(4):
+        add(animator)
+    animator.frame_budget = -1
+    assert clock.step()
+    assert animator.tweens and animator.job is not None
+
+    assert add(animator) is None
+    # Level-up stars are never dropped
+    assert animator.add_text(0, 0, "⭐", "gold", None, frames=10, droppable=False) is not None